@@ -0,0 +1,286 @@
+"""Headless rendering benchmarks for Породични Дуел.
+
+Run with `python benchmark.py` from the game folder; SDL's dummy video/audio drivers are used so no
+window is opened. Every screen is driven for a fixed number of frames at several resolutions and
+the frames/sec, frame time percentiles and peak RSS are written to a JSON file. With --baseline the
+results are compared against a stored run and the exit code is 1 when a case got slower.
+"""
+import os, sys, json, time, random, argparse, tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from main import ConfettiParticle, ConfettiSystem, FamilyFeudGame, FrameGovernor, Animator, percentile
+
+RESOLUTIONS = [(800, 600), (1200, 800), (1920, 1080), (3840, 2160)]
+WARMUP_FRAMES = 10
+
+class BenchmarkDone(Exception):
+    """Raised from the patched display functions once a case has rendered enough frames."""
+
+class FrameRecorder:
+    """Timestamps every display.flip/display.update and stops the running screen after `frames`."""
+    def __init__(self):
+        self.flip = pygame.display.flip
+        self.update = pygame.display.update
+        self.times = []
+        self.limit = 0
+
+    def install(self):
+        def flip():
+            self.flip()
+            self.record()
+
+        def update(*args):
+            self.update(*args)
+            self.record()
+
+        pygame.display.flip = flip
+        pygame.display.update = update
+
+    def uninstall(self):
+        pygame.display.flip = self.flip
+        pygame.display.update = self.update
+
+    def start(self, frames):
+        self.times = [time.perf_counter()]
+        self.limit = frames + WARMUP_FRAMES
+
+    def record(self):
+        self.times.append(time.perf_counter())
+        if len(self.times) > self.limit:
+            raise BenchmarkDone()
+
+    def frame_times(self):
+        """Milliseconds between consecutive presents, without the warmup frames."""
+        times = self.times[WARMUP_FRAMES:]
+        return [(b - a) * 1000 for a, b in zip(times, times[1:])]
+
+class UncappedClock:
+    """Stands in for the game's Clock so tick() keeps the frame delta but never sleeps to the cap."""
+    def __init__(self, clock):
+        self.clock = clock
+
+    def tick(self, framerate=0):
+        return self.clock.tick()
+
+    def __getattr__(self, name):
+        return getattr(self.clock, name)
+
+class BenchmarkGame(FamilyFeudGame):
+    """The game without its network servers; run with a throwaway data_dir for the journal and question bank."""
+    def load_settings(self):
+        settings = super().load_settings()
+        settings.update({"buzzer": False, "spectator": False})
+        return settings
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 2**20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def sample_board(answer_count):
+    question = "Наведите нешто што се носи на плажу"
+    answers = [{"answer": f"Одговор {i + 1}", "points": 40 - i * 4, "revealed": i % 2 == 0}
+               for i in range(answer_count)]
+    return question, answers
+
+# ----------------- Cases -----------------
+# Each case drives one screen until the recorder raises BenchmarkDone.
+
+def case_choose_team(game):
+    game.choose_team(0, 0)
+
+def board_case(answer_count):
+    def case(game):
+        question, answers = sample_board(answer_count)
+        while True:
+            game.draw_board(question, answers, 1, "active", 1)
+            game.tick()
+    return case
+
+def case_strike(game):
+    question, answers = sample_board(8)
+    while True:
+        if not game.animator.active:
+            game.show_wrong_feedback()
+        game.animator.update(game.frame_dt)
+        game.present(lambda: game.draw_board(question, answers, 1, "active", 1, present=False))
+        game.tick()
+
+def case_round_over(game):
+    game.round_results = [f"Рунда {i}: {30 + i}:{20 - i}" for i in range(1, 6)]
+    while True:
+        if not game.animator.active:
+            game.animator.play(game.show_round_over_popup(game.round_results))
+        game.animator.update(game.frame_dt)
+        game.present(game.draw_background)
+        game.tick()
+
+def case_confetti(game):
+    game.show_confetti(duration=10**9)
+    game.play_animations()
+
+def case_settings(game):
+    game.settings_menu()
+
+CASES = {
+    "choose_team": case_choose_team,
+    "board_4": board_case(4),
+    "board_8": board_case(8),
+    "strike": case_strike,
+    "round_over": case_round_over,
+    "confetti": case_confetti,
+    "settings_menu": case_settings,
+}
+
+def run_suite(case_names, resolutions, frames):
+    with tempfile.TemporaryDirectory() as data_dir:
+        return run_cases(BenchmarkGame(data_dir=data_dir), case_names, resolutions, frames)
+
+def run_cases(game, case_names, resolutions, frames):
+    recorder = FrameRecorder()
+    game.clock = UncappedClock(game.clock)
+    # Pin the quality so the governor cannot hide a regression by degrading the frame
+    game.governor = FrameGovernor(pinned="high")
+    game.apply_quality()
+    pygame.mixer.music.set_volume(0)
+    results = {}
+    recorder.install()
+    try:
+        for width, height in resolutions:
+            game.settings.update({"screen_width": width, "screen_height": height, "fullscreen": False})
+            game.apply_settings()
+            for name in case_names:
+                game.animator = Animator()
+                game.invalidate_board()
+                game.board_layout = None
+                pygame.event.clear()
+                recorder.start(frames)
+                try:
+                    CASES[name](game)
+                except BenchmarkDone:
+                    pass
+                times = sorted(recorder.frame_times())
+                total = sum(times)
+                key = f"{name}@{width}x{height}"
+                results[key] = {
+                    "fps": round(len(times) * 1000 / total, 1) if total else None,
+                    "p50_ms": round(percentile(times, 50), 2),
+                    "p95_ms": round(percentile(times, 95), 2),
+                    "p99_ms": round(percentile(times, 99), 2),
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+                print(f"{key:<28} {results[key]['fps']:>8} fps  p50 {results[key]['p50_ms']:>7} ms  "
+                      f"p95 {results[key]['p95_ms']:>7} ms  p99 {results[key]['p99_ms']:>7} ms  "
+                      f"RSS {results[key]['peak_rss_mb']} MB")
+    finally:
+        recorder.uninstall()
+        game.close()
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the cases whose fps dropped or whose p95 frame time grew by more than `tolerance`."""
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None or not base.get("fps"):
+            continue
+        if current["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{key}: {current['fps']} fps (основа {base['fps']})")
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {current['p95_ms']} ms (основа {base['p95_ms']})")
+    return regressions
+
+def time_frames(frame, frames):
+    """Run `frame` the given number of times and return the achieved frames per second."""
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    elapsed = time.perf_counter() - start
+    return frames / elapsed if elapsed > 0 else float("inf")
+
+def bench_confetti(counts, frames, size):
+    """Compare the per-object ConfettiParticle loop with the vectorized ConfettiSystem."""
+    screen = pygame.display.set_mode(size)
+    width, height = size
+    results = []
+    for count in counts:
+        particles = [ConfettiParticle(random.randint(0, width), 0) for _ in range(count)]
+
+        def legacy_frame():
+            screen.fill((0, 0, 0))
+            for p in particles:
+                p.update()
+                p.draw(screen)
+
+        system = ConfettiSystem(count, width, height, seed=0)
+
+        def vectorized_frame():
+            screen.fill((0, 0, 0))
+            system.update()
+            system.draw(screen)
+
+        results.append((count, time_frames(legacy_frame, frames), time_frames(vectorized_frame, frames)))
+    return results
+
+def parse_resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless rendering benchmarks")
+    parser.add_argument("--frames", type=int, default=300, help="frames to render per case")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES),
+                        help="screens to benchmark")
+    parser.add_argument("--resolutions", type=parse_resolution, nargs="+", default=RESOLUTIONS,
+                        help="resolutions as WIDTHxHEIGHT")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative fps drop / p95 growth before a case counts as a regression")
+    parser.add_argument("--confetti", type=int, nargs="+",
+                        help="only compare per-object and numpy confetti at these particle counts")
+    args = parser.parse_args()
+
+    if args.confetti:
+        pygame.init()
+        print(f"{'particles':>10} {'per-object fps':>15} {'numpy fps':>10}")
+        for count, legacy_fps, vectorized_fps in bench_confetti(args.confetti, args.frames, (1200, 800)):
+            print(f"{count:>10} {legacy_fps:>15.1f} {vectorized_fps:>10.1f}")
+        pygame.quit()
+        return 0
+
+    results = run_suite(args.cases, args.resolutions, args.frames)
+    report = {"frames": args.frames, "platform": sys.platform, "pygame": pygame.version.ver,
+              "python": sys.version.split()[0], "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"Резултати су сачувани у {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"РЕГРЕСИЈА {line}")
+        if regressions:
+            return 1
+        print("Нема регресија у односу на основу.")
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
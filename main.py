@@ -1,4 +1,8 @@
-import pygame, sys, sqlite3, os, math, json, random, cv2
+import pygame, sys, sqlite3, os, math, json, random, threading, time, gzip, argparse, hashlib, re, multiprocessing, asyncio
+import io, mmap, struct, tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pygame.locals import KEYDOWN, K_ESCAPE, K_x, QUIT, MOUSEBUTTONDOWN, MOUSEMOTION
 
 def resource_path(relative_path):
@@ -15,7 +19,28 @@ DEFAULT_SETTINGS = {
     "screen_height": 800,
     "fullscreen": False,
     "volume": 100,
-    "music_volume": 100
+    "music_volume": 100,
+    "video_streaming": True,
+    "video_memory_mb": 96,
+    "retained_board": True,
+    "confetti_particles": 1500,
+    "quality": "auto",
+    "debug_overlay": False,
+    "profiler": False,
+    "profile_output": "",
+    "rounds": 5,
+    "question_category": "",
+    "question_difficulty": 0,
+    "prefetch_rounds": 1,
+    "buzzer": False,
+    "buzzer_port": 7777,
+    "buzzer_window_ms": 40,
+    "spectator": False,
+    "spectator_port": 8080,
+    "spectator_fps": 15,
+    "spectator_quality": 75,
+    "spectator_max_width": 1280,
+    "audio_debug": False
 }
 
 WHITE    = (255, 255, 255)
@@ -38,6 +63,9 @@ SETTINGS_SIZE  = 21
 
 BOARD_VERTICAL_OFFSET = 100  # Shift the question/answers board downward
 
+STRIKE_DURATION = 1250  # milliseconds the wrong-answer "X" stays on screen
+STRIKE_FRAMES   = 75    # precomputed scale/fade steps of the "X" (one per frame at 60 FPS)
+
 # Font paths - search in these locations with these filenames
 FONT_PATHS = [
     "assets/fonts/OpenSans-Regular.ttf",
@@ -50,21 +78,677 @@ BOLD_FONT_PATHS = [
     "assets/fonts/Roboto-Bold.ttf"
 ]
 
+# Fonts the game uses at fixed sizes - loaded once at startup and never evicted
+PRELOADED_FONTS = [
+    (FONT_PATHS, REGULAR_SIZE, False),
+    (BOLD_FONT_PATHS, QUESTION_SIZE, True),
+    (FONT_PATHS, FOOTER_SIZE, False),
+    (BOLD_FONT_PATHS, HEADER_SIZE, True),
+    (BOLD_FONT_PATHS, FINAL_SIZE, True),
+    (BOLD_FONT_PATHS, BIG_SIZE, True),
+    (FONT_PATHS, SETTINGS_SIZE, False)
+]
+# Rendering quality steps used by the frame governor, best first
+QUALITY_LEVELS = [
+    {"name": "high",    "video_frame_step": 1, "glaze": True,  "smooth_scaling": True,  "max_particles": None},
+    {"name": "medium",  "video_frame_step": 1, "glaze": False, "smooth_scaling": True,  "max_particles": 3000},
+    {"name": "low",     "video_frame_step": 2, "glaze": False, "smooth_scaling": False, "max_particles": 1000},
+    {"name": "minimal", "video_frame_step": 4, "glaze": False, "smooth_scaling": False, "max_particles": 300}
+]
+TARGET_FPS = 60
+
+PROFILER_WINDOW = 600  # Frames kept for the profiler's rolling percentiles
+
+GAME_DB = "family_feud.db"  # Game journal; kept across starts so an interrupted game can be resumed
+JOURNAL_FLUSH_MS = 250  # The journal writer batches the events of this long into one transaction
+
+QUESTION_DB = "questions.db"  # Indexed question bank, filled from questions/*.txt on first start
+QUESTIONS_DIR = "questions"  # Compiled into the bank on every start; subfolders become categories
+SIMULATION_CHUNKS_PER_WORKER = 4  # The simulator splits its rounds into this many chunks per process
+COMPILE_PARALLEL_FILES = 64  # Changed files needed before the compiler starts worker processes
+MAX_KEYED_ANSWERS = 9  # Answers beyond this cannot be revealed with the digit keys
+SURVEY_TOTAL = 100  # Survey answers of one question should not add up to more points than this
+CYRILLIC = re.compile(r"[\u0400-\u04FF]")
+LATIN = re.compile(r"[A-Za-z\u00C0-\u024F]")
+
+ASSET_BUNDLE = "assets.bundle"  # All game files in one memory-mapped file, read instead of the loose files when present
+BUNDLE_DIRS = ("assets", QUESTIONS_DIR)  # Folders packed by --build-bundle
+BUNDLE_MAGIC = b"FFBUNDL1"
+BUNDLE_HEADER = struct.Struct("<8sQQ")  # Magic, then offset and length of the JSON index
+
+AUDIO_FORMATS = (".ogg", ".mp3", ".wav")  # An audio asset is taken in the first of these formats that exists
+AUDIO_BUFFER = 512  # Mixer buffer in samples: about 12 ms at 44.1 kHz before an effect is heard
+EFFECT_CHANNELS = {"correct": (0, 1), "wrong": (2,), "victory": (3,)}  # Reserved mixer channels per sound
+
+BUZZER_EVENT = pygame.USEREVENT + 1  # A face-off decided by the buzzer server (team, client, pressed_at)
+BUZZER_PING_MS = 1000  # How often the buzzer server measures each client's round trip time
+BUZZER_TEST_MARGIN_MS = 3  # --buzzer-test: closer presses are left to the simulated links' timer jitter
+
+SPECTATOR_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Породични Дуел</title>
+<style>html,body{margin:0;height:100%;background:#000}img{width:100%;height:100%;object-fit:contain}</style>
+</head><body><img src="/stream.mjpg" alt=""></body></html>
+"""
+
+MAX_CACHED_FONTS = 16  # Ad-hoc sizes kept in the font registry before LRU eviction
+TEXT_CACHE_BYTES = 32 * 1024 * 1024  # Pixel memory for cached rendered text before LRU eviction
+
 # ----------------- Helper Functions -----------------
-def load_font(font_paths, size, fallback_name=None):
+def load_font(font_paths, size, fallback_name=None, bold=False):
+    """Get a font from the process-wide registry; it is read from disk only the first time."""
+    return FONT_REGISTRY.get(font_paths, size, fallback_name, bold)
+
+def open_font(font_paths, size, fallback_name=None, bold=False):
     """Try to load fonts from the given paths, with fallback to system font."""
     for path in font_paths:
         try:
-            full_path = resource_path(path)
-            if os.path.exists(full_path):
-                return pygame.font.Font(full_path, size)
+            if ASSETS.exists(path):
+                return pygame.font.Font(ASSETS.source(path), size)
         except Exception as e:
             print(f"Could not load font {path}: {e}")
     
     # If we get here, none of the custom fonts worked
-    return pygame.font.SysFont(fallback_name, size)
+    return pygame.font.SysFont(fallback_name, size, bold=bold)
+
+def audio_asset(name):
+    """Asset path of assets/<name> in the first of AUDIO_FORMATS that exists, or None."""
+    for extension in AUDIO_FORMATS:
+        path = f"assets/{name}{extension}"
+        if ASSETS.exists(path):
+            return path
+    return None
+
+def asset_size(relative_paths):
+    """Size in bytes of the first existing file among the given asset paths (0 if none exist)."""
+    for path in relative_paths:
+        if ASSETS.exists(path):
+            return ASSETS.size(path)
+    return 0
+
+def questions_bundled():
+    """Whether the asset bundle carries a question folder to compile when there is none on disk."""
+    bundle = ASSETS.get_bundle()
+    return bundle is not None and bool(bundle.files(QUESTIONS_DIR, ".txt"))
+
+def new_surface(size, flags=0):
+    """A new pygame.Surface, counted by the frame profiler; the game makes its surfaces through this."""
+    PROFILER.count_allocation()
+    return pygame.Surface(size, flags)
+
+def scaled_surface(surface, size, smooth=False):
+    """pygame.transform.scale (or smoothscale) into a new surface, counted by the frame profiler."""
+    PROFILER.count_allocation()
+    return (pygame.transform.smoothscale if smooth else pygame.transform.scale)(surface, size)
+
+def converted(surface, alpha=False):
+    """surface.convert() (convert_alpha() with `alpha`), counted by the frame profiler; unchanged without a display."""
+    if pygame.display.get_surface() is None:
+        return surface
+    PROFILER.count_allocation()
+    return surface.convert_alpha() if alpha else surface.convert()
+
+def percentile(samples, point):
+    """Nearest-rank percentile of already sorted, non-empty samples."""
+    return samples[min(len(samples) - 1, len(samples) * point // 100)]
+
+def mixed_script_words(text):
+    """Words that mix Cyrillic and Latin letters, usually a typo like "Мирis"."""
+    return [word for word in re.findall(r"\w+", text) if CYRILLIC.search(word) and LATIN.search(word)]
+
+def parse_question_text(text):
+    """Parse and lint a question file ("answer,points" split at the last comma) into (question, answers, issues)."""
+    lines = [(number, line.strip()) for number, line in enumerate(text.splitlines(), 1) if line.strip()]
+    if not lines:
+        return None, [], [("error", 0, "фајл је празан")]
+    issues = []
+    question_line, question = lines[0]
+    seen = {}
+    answers = []
+    for number, line in lines[1:]:
+        answer, sep, points = line.rpartition(",")
+        answer = answer.strip()
+        if not sep or not answer:
+            issues.append(("error", number, f"ред „{line}“ није у облику одговор,поени"))
+            continue
+        try:
+            points = int(points.strip())
+        except ValueError:
+            issues.append(("error", number, f"поени „{points.strip()}“ нису цео број"))
+            continue
+        if points < 0:
+            issues.append(("error", number, f"негативни поени ({points})"))
+            continue
+        if answer.casefold() in seen:
+            issues.append(("warning", number, f"одговор „{answer}“ се понавља (ред {seen[answer.casefold()]})"))
+        seen[answer.casefold()] = number
+        answers.append({"answer": answer, "points": points, "line": number})
+    for number, line in [(question_line, question)] + [(a["line"], a["answer"]) for a in answers]:
+        for word in mixed_script_words(line):
+            issues.append(("warning", number, f"реч „{word}“ меша ћирилицу и латиницу"))
+    if not answers:
+        issues.append(("error", question_line, "питање нема ниједан одговор"))
+    if len(answers) > MAX_KEYED_ANSWERS:
+        issues.append(("warning", answers[MAX_KEYED_ANSWERS]["line"],
+                       f"{len(answers)} одговора; тастерима 1-9 се не могу открити они после деветог"))
+    total = sum(a["points"] for a in answers)
+    if total > SURVEY_TOTAL:
+        issues.append(("warning", question_line, f"збир поена је {total}, више од {SURVEY_TOTAL}"))
+    for previous, answer in zip(answers, answers[1:]):
+        if answer["points"] > previous["points"]:
+            issues.append(("warning", answer["line"], "одговори нису поређани по поенима"))
+            break
+    for answer in answers:
+        del answer["line"]
+    return question, answers, issues
+
+def compile_question_file(path):
+    """Read, hash and lint one question file; the question-pack compiler runs this in worker processes."""
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    return compile_question_data(path, data, stat.st_mtime_ns, stat.st_size)
+
+def compile_question_data(path, data, mtime_ns, size):
+    """Hash and lint the contents of one question file, read from disk or from the asset bundle."""
+    try:
+        question, answers, issues = parse_question_text(data.decode("utf-8-sig"))
+    except UnicodeDecodeError:
+        question, answers, issues = None, [], [("error", 0, "фајл није у UTF-8 кодирању")]
+    return {"path": path, "mtime_ns": mtime_ns, "size": size,
+            "digest": hashlib.sha1(data).hexdigest(), "question": question, "answers": answers, "issues": issues}
+
+def format_lint_report(issues):
+    """Compiler-style lines, "path:line: severity: message", errors first."""
+    labels = {"error": "грешка", "warning": "упозорење"}
+    ordered = sorted(issues, key=lambda issue: (issue[1] != "error", issue[0], issue[2]))
+    return [f"{path}:{line}: {labels[severity]}: {message}" for path, severity, line, message in ordered]
+
+def simulate_rounds(point_lists, count, skill=0.6, seed=0):
+    """Play `count` random rounds of RoundState and check its scores against a separate tally; returns mergeable totals."""
+    rng = random.Random(seed)
+    totals = {"rounds": 0, "points": 0, "available": 0, "found": 0, "answers": 0, "steals": 0,
+              "steals_won": 0, "violations": [], "questions": [[0, 0, 0, 0] for _ in point_lists]}
+    questions = totals["questions"]
+    for n in range(count):
+        number = rng.randrange(len(point_lists))
+        points = point_lists[number]
+        active_team = rng.randint(1, 2)
+        round_state = RoundState(points, active_team)
+        collected, winner, moves = 0, active_team, 0
+        while round_state.state != "round_over" and moves <= len(points) + 4:
+            moves += 1
+            if rng.random() < skill:
+                hidden = [i for i in range(len(points)) if not round_state.revealed >> i & 1]
+                index = rng.choices(hidden, [points[i] + 1 for i in hidden])[0]
+                if round_state.reveal(index) == "steal":
+                    winner = 3 - active_team
+                collected += points[index]
+            else:
+                round_state.strike()
+        expected = (collected, 0) if winner == 1 else (0, collected)
+        if (round_state.state != "round_over" or round_state.strikes > 3
+                or (round_state.team1_round, round_state.team2_round) != expected):
+            if len(totals["violations"]) < 5:
+                totals["violations"].append(
+                    f"бодови {points}, тим {active_team}: стање {round_state.state}, {round_state.strikes} грешака, "
+                    f"{round_state.team1_round}:{round_state.team2_round} уместо {expected[0]}:{expected[1]}")
+            continue
+        stolen = round_state.strikes >= 3
+        totals["rounds"] += 1
+        totals["points"] += collected
+        totals["available"] += sum(points)
+        totals["found"] += bin(round_state.revealed).count("1")
+        totals["answers"] += len(points)
+        totals["steals"] += stolen
+        totals["steals_won"] += winner != active_team
+        question = questions[number]
+        question[0] += 1
+        question[1] += collected
+        question[2] += stolen
+        question[3] += winner != active_team
+    return totals
+
+def simulate_chunk(args):
+    """simulate_rounds() with packed arguments, for the simulator's worker processes."""
+    return simulate_rounds(*args)
+
+def merge_simulations(results):
+    merged = None
+    for result in results:
+        if merged is None:
+            merged = result
+            continue
+        for key in ("rounds", "points", "available", "found", "answers", "steals", "steals_won"):
+            merged[key] += result[key]
+        merged["violations"] += result["violations"][:5 - len(merged["violations"])]
+        for total, question in zip(merged["questions"], result["questions"]):
+            for i, value in enumerate(question):
+                total[i] += value
+    return merged
+
+def run_simulation(point_lists, count, skill=0.6, workers=None, seed=0):
+    """Split `count` simulated rounds across a process pool (in this process with one worker)."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return simulate_rounds(point_lists, count, skill, seed)
+    chunks = workers * SIMULATION_CHUNKS_PER_WORKER
+    jobs = [(point_lists, count // chunks + (i < count % chunks), skill, seed + i) for i in range(chunks)]
+    with ProcessPoolExecutor(workers) as pool:
+        return merge_simulations(pool.map(simulate_chunk, jobs))
+
+def format_simulation(totals, names, seconds, width=48):
+    """Report lines of --simulate: rule violations, overall rates and the questions most often stolen."""
+    rounds = max(totals["rounds"], 1)
+    lines = [f"Одиграно {totals['rounds']} рунди за {seconds:.1f} s ({totals['rounds'] / max(seconds, 1e-9) * 60:,.0f} у минути).",
+             f"Просечно {totals['points'] / rounds:.1f} поена по рунди, {totals['points'] / max(totals['available'], 1):.0%} "
+             f"могућих; пронађено {totals['found'] / max(totals['answers'], 1):.0%} одговора.",
+             f"Крађа у {totals['steals'] / rounds:.0%} рунди, успешно {totals['steals_won'] / max(totals['steals'], 1):.0%}."]
+    lines += [f"ПРЕКРШЕНО ПРАВИЛО: {violation}" for violation in totals["violations"]]
+    played = [(question[2] / question[0], question[1] / question[0], name)
+              for name, question in zip(names, totals["questions"]) if question[0]]
+    lines.append("Питања са највише крађа:")
+    for steal_rate, average, name in sorted(played, reverse=True)[:5]:
+        short = name if len(name) <= width else name[:width - 1] + "…"
+        lines.append(f"  {short} — крађа {steal_rate:.0%}, просечно {average:.1f} поена")
+    return lines
+
+def format_stats(stats, width=48):
+    """Lines of the statistics screen and of --stats, from GameJournal.stats()."""
+    def short(text):
+        return text if len(text) <= width else text[:width - 1] + "…"
+
+    lines = ["Табела тимова:"]
+    lines += [f"  {rank}. {team}: {wins} победа, {draws} нерешено у {games} игара, "
+              f"{average:.1f} поена по рунди, {steals_won} украдених рунди"
+              for rank, (team, games, wins, draws, average, steals_won) in enumerate(stats["teams"], 1)]
+    lines.append("Најтежа питања (пронађено одговора):")
+    lines += [f"  {short(question)} — {found:.0%} у {plays} игара" for question, plays, found in stats["hardest"]]
+    lines.append("Питања са највише крађа:")
+    lines += [f"  {short(question)} — {steals:.0%} од {plays} игара, {won} успешно"
+              for question, plays, steals, won in stats["stolen"]]
+    lines.append("Најређе пронађени одговори:")
+    lines += [f"  {short(answer)} ({points}) на „{short(question)}“ — {found:.0%} од {shown}"
+              for question, answer, points, shown, found in stats["rarest"]]
+    return lines
 
 # ----------------- Helper Classes -----------------
+class AssetBundle:
+    """Game files packed into one memory-mapped file by build(): a header, the contents, then a JSON index."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = BUNDLE_HEADER.unpack(self.map[:BUNDLE_HEADER.size])
+        if magic != BUNDLE_MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} није пакет ресурса")
+        index = self.map[offset:offset + length]
+        self.index = json.loads(index)
+        self.digest = hashlib.sha1(index).hexdigest()[:16]
+
+    @staticmethod
+    def build(path, directories=BUNDLE_DIRS):
+        """Pack every file under `directories` into a bundle at `path`. Returns (files, bytes)."""
+        index = {}
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as out:
+            out.write(b"\0" * BUNDLE_HEADER.size)
+            for directory in directories:
+                for root, dirs, names in os.walk(directory):
+                    dirs.sort()
+                    for name in sorted(names):
+                        source = os.path.join(root, name)
+                        with open(source, "rb") as f:
+                            data = f.read()
+                        index[source.replace(os.sep, "/")] = [out.tell(), len(data), os.stat(source).st_mtime_ns]
+                        out.write(data)
+            offset = out.tell()
+            encoded = json.dumps(index, ensure_ascii=False).encode("utf-8")
+            out.write(encoded)
+            size = out.tell()
+            out.seek(0)
+            out.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, offset, len(encoded)))
+        os.replace(temporary, path)
+        return len(index), size
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def size(self, name):
+        return self.index[name][1]
+
+    def read(self, name):
+        offset, size, _ = self.index[name]
+        return self.map[offset:offset + size]
+
+    def files(self, directory, suffix=""):
+        """{name: (mtime_ns, size)} of the packed files under `directory` whose names end with `suffix`."""
+        prefix = directory.rstrip("/") + "/"
+        return {name: (mtime_ns, size) for name, (_, size, mtime_ns) in self.index.items()
+                if name.startswith(prefix) and name.endswith(suffix)}
+
+    def extract(self, name):
+        """Path of a copy of `name` on disk, written on first use and reused by later starts."""
+        target = os.path.join(tempfile.gettempdir(), f"family_feud_{self.digest}", *name.split("/"))
+        if not os.path.exists(target) or os.path.getsize(target) != self.size(name):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target + ".tmp", "wb") as f:
+                f.write(self.read(name))
+            os.replace(target + ".tmp", target)
+        return target
+
+    def close(self):
+        self.map.close()
+
+class Assets:
+    """Game files by relative path, from the asset bundle when there is one and from resource_path() otherwise."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.searched = False
+        self.bundle = None
+
+    def get_bundle(self):
+        with self.lock:
+            if not self.searched:
+                self.searched = True
+                folders = [os.path.dirname(sys.executable)] if getattr(sys, "frozen", False) else []
+                for folder in folders + [resource_path("")]:
+                    path = os.path.join(folder, ASSET_BUNDLE)
+                    if os.path.exists(path):
+                        try:
+                            self.bundle = AssetBundle(path)
+                            break
+                        except (OSError, ValueError, struct.error) as e:
+                            print(f"Пакет ресурса {path} није учитан: {e}")
+            return self.bundle
+
+    def exists(self, name):
+        bundle = self.get_bundle()
+        return (bundle is not None and name in bundle) or os.path.exists(resource_path(name))
+
+    def size(self, name):
+        bundle = self.get_bundle()
+        if bundle is not None and name in bundle:
+            return bundle.size(name)
+        return os.path.getsize(resource_path(name))
+
+    def source(self, name):
+        bundle = self.get_bundle()
+        if bundle is not None and name in bundle:
+            return io.BytesIO(bundle.read(name))
+        return resource_path(name)
+
+    def path(self, name):
+        """A file name for `name` on disk, or None when it does not exist."""
+        bundle = self.get_bundle()
+        if bundle is not None and name in bundle:
+            return bundle.extract(name)
+        path = resource_path(name)
+        return path if os.path.exists(path) else None
+
+    def image(self, name):
+        return pygame.image.load(self.source(name), name)
+
+    def sound(self, name):
+        return pygame.mixer.Sound(self.source(name))
+
+    def close(self):
+        with self.lock:
+            if self.bundle is not None:
+                self.bundle.close()
+            self.bundle = None
+            self.searched = False
+
+ASSETS = Assets()
+
+class FontRegistry:
+    """Process-wide font cache keyed by (font paths, size, fallback, bold); pinned fonts stay, others are LRU."""
+    def __init__(self, max_cached=MAX_CACHED_FONTS):
+        self.max_cached = max_cached
+        self.pinned = {}
+        self.cached = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(font_paths, size, fallback_name, bold):
+        return tuple(font_paths), size, fallback_name, bold
+
+    def get(self, font_paths, size, fallback_name=None, bold=False, pin=False):
+        key = self.make_key(font_paths, size, fallback_name, bold)
+        with self.lock:
+            font = self.pinned.get(key)
+            if font is None and key in self.cached:
+                font = self.cached[key]
+                self.cached.move_to_end(key)
+            if font is not None:
+                self.hits += 1
+                return font
+            self.misses += 1
+        font = open_font(font_paths, size, fallback_name, bold)
+        with self.lock:
+            if pin:
+                self.cached.pop(key, None)
+                self.pinned[key] = font
+            else:
+                self.cached[key] = font
+                while len(self.cached) > self.max_cached:
+                    self.cached.popitem(last=False)
+                    self.evictions += 1
+        return font
+
+    def preload(self, font_paths, size, fallback_name=None, bold=False):
+        return self.get(font_paths, size, fallback_name, bold, pin=True)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "pinned": len(self.pinned),
+                "cached": len(self.cached)
+            }
+
+FONT_REGISTRY = FontRegistry()
+
+class FrameProfiler:
+    """Optional per-phase frame timing with rolling p50/p95/p99 and surface allocation counts."""
+    PHASES = ("events", "background", "board", "text", "glaze", "animations", "flip", "prefetch", "capture")
+
+    def __init__(self, window=PROFILER_WINDOW):
+        self.enabled = False
+        self.window = window
+        self.history = {}
+        self.frame = {}
+        self.stack = []
+        self.allocations = 0
+        self.frame_start = None
+        self.frames = 0
+        self.output = None
+        self.output_format = None
+
+    def enable(self, output_path=None):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.frame_start = None
+        if output_path:
+            self.output_format = "csv" if output_path.lower().endswith(".csv") else "jsonl"
+            new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+            self.output = open(output_path, "a", encoding="utf-8")
+            if self.output_format == "csv" and new_file:
+                self.output.write(",".join(("frame", "frame_ms", "work_ms") + self.PHASES + ("allocations",)) + "\n")
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.stack.clear()
+        self.frame.clear()
+        if self.output:
+            self.output.close()
+            self.output = None
+
+    def begin(self, name):
+        if not self.enabled:
+            return
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def end(self, name):
+        if not self.enabled or not self.stack:
+            return
+        name, start, child_time = self.stack.pop()
+        elapsed = time.perf_counter() - start
+        self.frame[name] = self.frame.get(name, 0.0) + (elapsed - child_time) * 1000
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def count_allocation(self):
+        if self.enabled:
+            self.allocations += 1
+
+    def end_frame(self, work_ms):
+        """Close the current frame; `work_ms` is the frame's cost without the clock's wait."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        row = {"frame": self.frames,
+               "frame_ms": (now - self.frame_start) * 1000 if self.frame_start else 0.0,
+               "work_ms": work_ms}
+        for phase in self.PHASES:
+            row[phase] = self.frame.get(phase, 0.0)
+        row["allocations"] = self.allocations
+        for key, value in row.items():
+            if key != "frame":
+                self.history.setdefault(key, deque(maxlen=self.window)).append(value)
+        if self.output:
+            if self.output_format == "csv":
+                self.output.write(",".join(str(round(value, 3)) for value in row.values()) + "\n")
+            else:
+                self.output.write(json.dumps({key: round(value, 3) for key, value in row.items()}) + "\n")
+        self.frames += 1
+        self.frame.clear()
+        self.stack.clear()
+        self.allocations = 0
+        self.frame_start = now
+
+    def percentiles(self, key, points=(50, 95, 99)):
+        samples = sorted(self.history.get(key, ()))
+        if not samples:
+            return [0.0 for _ in points]
+        return [percentile(samples, point) for point in points]
+
+    def report_lines(self):
+        lines = ["фаза          p50    p95    p99 (ms)"]
+        for key in ("work_ms",) + self.PHASES:
+            p50, p95, p99 = self.percentiles(key)
+            lines.append(f"{key:<12}{p50:>6.2f} {p95:>6.2f} {p99:>6.2f}")
+        p50, p95, p99 = self.percentiles("allocations")
+        lines.append(f"{'allocations':<12}{p50:>6.0f} {p95:>6.0f} {p99:>6.0f}")
+        return lines
+
+PROFILER = FrameProfiler()
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color, antialias), bounded by pixel memory."""
+    def __init__(self, max_bytes=TEXT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()  # The round prefetcher renders from its own thread; fonts are only used under it
+        self.surfaces = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.surfaces.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+            surface = font.render(text, antialias, color)
+            PROFILER.count_allocation()
+            self.surfaces[key] = surface
+            self.total_bytes += self.surface_bytes(surface)
+            while self.total_bytes > self.max_bytes and len(self.surfaces) > 1:
+                _, evicted = self.surfaces.popitem(last=False)
+                self.total_bytes -= self.surface_bytes(evicted)
+                self.evictions += 1
+            return surface
+
+    @staticmethod
+    def surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def clear(self):
+        with self.lock:
+            self.surfaces.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.surfaces),
+                "bytes": self.total_bytes
+            }
+
+TEXT_CACHE = TextCache()
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared text cache. The returned surface must not be modified."""
+    PROFILER.begin("text")
+    surface = TEXT_CACHE.render(font, text, color, antialias)
+    PROFILER.end("text")
+    return surface
+
+class AssetLoader:
+    """Run asset loading jobs on worker threads and track progress weighted by file size."""
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-loader")
+        self.jobs = {}  # name -> (weight, future)
+        self.timings = {}  # name -> seconds spent in the job
+
+    def submit(self, name, func, *args, weight=1):
+        def timed_job():
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.timings[name] = time.perf_counter() - start
+        # Empty or missing files still count as one item so the bar keeps moving
+        self.jobs[name] = (max(weight, 1), self.executor.submit(timed_job))
+
+    def progress(self):
+        total = sum(weight for weight, _ in self.jobs.values())
+        done = sum(weight for weight, future in self.jobs.values() if future.done())
+        return done / total if total else 1.0
+
+    def done(self):
+        return all(future.done() for _, future in self.jobs.values())
+
+    def result(self, name, default=None):
+        try:
+            return self.jobs[name][1].result()
+        except Exception as e:
+            print(f"Could not load {name}: {e}")
+            return default
+
+    def report(self):
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            print(f"Loaded {name} in {seconds * 1000:.1f} ms")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
 class ConfettiParticle:
     def __init__(self, x, y):
         self.x = x
@@ -82,138 +766,1904 @@ class ConfettiParticle:
     def draw(self, screen):
         pygame.draw.rect(screen, self.color, (int(self.x), int(self.y), self.size, self.size))
 
+class ConfettiSystem:
+    """Confetti stored in NumPy arrays: vectorized physics, respawn at the top and batched sprite blits."""
+    COLORS = [RED, BLUE, GOLD, YELLOW, WHITE]
+    MIN_SIZE = 5
+    MAX_SIZE = 10
+    GRAVITY = 0.1
+
+    def __init__(self, count, width, height, seed=None):
+        import numpy as np  # Optional dependency (comes with cv2); callers fall back to ConfettiParticle
+        self.np = np
+        self.rng = np.random.default_rng(seed)
+        self.width = width
+        self.height = height
+        self.count = count
+        self.x = np.empty(count, dtype=np.float32)
+        self.y = np.empty(count, dtype=np.float32)
+        self.vx = np.empty(count, dtype=np.float32)
+        self.vy = np.empty(count, dtype=np.float32)
+        self.size = np.empty(count, dtype=np.int16)
+        self.color = np.empty(count, dtype=np.int16)
+        # One prebuilt square per (color, size); sprite_index points each particle at its square
+        sizes = range(self.MIN_SIZE, self.MAX_SIZE + 1)
+        sprites = []
+        for color in self.COLORS:
+            for size in sizes:
+                sprite = new_surface((size, size))
+                sprite.fill(color)
+                sprites.append(converted(sprite))
+        self.sprites = np.empty(len(sprites), dtype=object)
+        self.sprites[:] = sprites
+        self.sprite_index = np.empty(count, dtype=np.int16)
+        self.respawn(np.arange(count), spread=True)
+        self.limit = count  # Only the first `limit` particles are simulated and drawn
+
+    def respawn(self, idx, spread=False):
+        """Put particles back above the top edge; `spread` staggers the first wave over a screen height."""
+        n = len(idx)
+        rng = self.rng
+        self.x[idx] = rng.uniform(0, self.width, n)
+        self.y[idx] = rng.uniform(-self.height, 0, n) if spread else rng.uniform(-20, -self.MAX_SIZE, n)
+        self.vx[idx] = rng.uniform(-2, 2, n)
+        self.vy[idx] = rng.uniform(2, 5, n)
+        self.size[idx] = rng.integers(self.MIN_SIZE, self.MAX_SIZE + 1, n)
+        self.color[idx] = rng.integers(0, len(self.COLORS), n)
+        self.sprite_index[idx] = self.color[idx] * (self.MAX_SIZE - self.MIN_SIZE + 1) + self.size[idx] - self.MIN_SIZE
+
+    def update(self, steps=1.0):
+        """Advance by `steps` frames of the original 60 fps physics."""
+        n = min(self.limit, self.count)
+        self.vy[:n] += self.GRAVITY * steps
+        self.x[:n] += self.vx[:n] * steps
+        self.y[:n] += self.vy[:n] * steps
+        fallen = self.np.flatnonzero(self.y[:n] > self.height)
+        if fallen.size:
+            self.respawn(fallen)
+
+    def draw(self, screen):
+        np = self.np
+        n = min(self.limit, self.count)
+        x, y = self.x[:n], self.y[:n]
+        visible = np.flatnonzero((y > -self.MAX_SIZE) & (x > -self.MAX_SIZE) & (x < self.width))
+        positions = zip(x[visible].astype(np.int32).tolist(), y[visible].astype(np.int32).tolist())
+        screen.blits(list(zip(self.sprites[self.sprite_index[visible]].tolist(), positions)), doreturn=False)
+
+class FrameGovernor:
+    """Keeps frames within budget by stepping through QUALITY_LEVELS, unless a level is pinned."""
+    def __init__(self, target_fps=TARGET_FPS, pinned=None, window=30, recover_frames=180):
+        self.budget = 1000 / target_fps
+        self.samples = deque(maxlen=window)
+        self.recover_frames = recover_frames
+        self.calm_frames = 0
+        names = [level["name"] for level in QUALITY_LEVELS]
+        self.pinned = pinned in names
+        self.level = names.index(pinned) if self.pinned else 0
+
+    @property
+    def quality(self):
+        return QUALITY_LEVELS[self.level]
+
+    @property
+    def average_ms(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def record(self, work_ms):
+        """Add one frame's work time; returns True when the quality level changed."""
+        self.samples.append(work_ms)
+        if self.pinned or len(self.samples) < self.samples.maxlen:
+            return False
+        average = self.average_ms
+        if average > self.budget * 0.9 and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+            return True
+        self.calm_frames = self.calm_frames + 1 if average < self.budget * 0.5 else 0
+        if self.calm_frames >= self.recover_frames and self.level > 0:
+            self.set_level(self.level - 1)
+            return True
+        return False
+
+    def set_level(self, level):
+        self.level = level
+        self.samples.clear()
+        self.calm_frames = 0
+
+class Tween:
+    """One timed step of an animation: draw(screen, progress) every frame, on_start and on_finish once."""
+    def __init__(self, duration, draw=None, on_start=None, on_finish=None, covers_screen=False):
+        self.duration = duration
+        self.draw = draw
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.covers_screen = covers_screen
+        self.elapsed = 0
+
+    @property
+    def progress(self):
+        return min(self.elapsed / self.duration, 1.0) if self.duration > 0 else 1.0
+
+class Timeline:
+    """Tweens played one after another."""
+    def __init__(self, steps, tag=None, blocking=True):
+        self.steps = list(steps)
+        self.tag = tag
+        self.blocking = blocking  # Blocking timelines take over input: a keypress skips their current step
+        self.index = -1
+        self.finished = False
+        self.advance()
+
+    @property
+    def current(self):
+        return self.steps[self.index] if not self.finished else None
+
+    def advance(self):
+        if self.index >= 0 and self.current.on_finish:
+            self.current.on_finish()
+        self.index += 1
+        if self.index >= len(self.steps):
+            self.finished = True
+        elif self.current.on_start:
+            self.current.on_start()
+
+    def update(self, dt):
+        while not self.finished:
+            step = self.current
+            step.elapsed += dt
+            if step.elapsed < step.duration:
+                return
+            dt = step.elapsed - step.duration
+            step.elapsed = step.duration
+            self.advance()
+
+    def skip(self):
+        """Jump to the end of the current step."""
+        if not self.finished:
+            self.current.elapsed = self.current.duration
+            self.advance()
+
+    def draw(self, screen):
+        if not self.finished and self.current.draw:
+            self.current.draw(screen, self.current.progress)
+
+class Animator:
+    """Runs timelines side by side from the main loop's frame time."""
+    def __init__(self):
+        self.timelines = []
+
+    def play(self, steps, tag=None, blocking=True):
+        """Start a timeline; a running timeline with the same tag is cancelled first."""
+        if tag is not None:
+            self.cancel(tag)
+        timeline = Timeline(steps, tag, blocking)
+        if not timeline.finished:
+            self.timelines.append(timeline)
+        return timeline
+
+    def cancel(self, tag):
+        self.timelines = [timeline for timeline in self.timelines if timeline.tag != tag]
+
+    def skip(self):
+        for timeline in list(self.timelines):
+            if timeline.blocking:
+                timeline.skip()
+        self.remove_finished()
+
+    def update(self, dt):
+        for timeline in list(self.timelines):
+            timeline.update(dt)
+        self.remove_finished()
+
+    def remove_finished(self):
+        self.timelines = [timeline for timeline in self.timelines if not timeline.finished]
+
+    def draw(self, screen):
+        for timeline in self.timelines:
+            timeline.draw(screen)
+
+    @property
+    def active(self):
+        return bool(self.timelines)
+
+    @property
+    def blocking(self):
+        return any(timeline.blocking for timeline in self.timelines)
+
+    def covers_screen(self):
+        return any(timeline.current.covers_screen for timeline in self.timelines)
+
+class InputSession:
+    """Where each frame's input and duration come from: live, recorded to a gzipped JSON-lines log, or replayed."""
+    RECORDED_TYPES = (QUIT, KEYDOWN, MOUSEBUTTONDOWN, MOUSEMOTION, BUZZER_EVENT)
+    EVENT_FIELDS = ("key", "mod", "unicode", "scancode", "pos", "rel", "buttons", "button", "team", "client")
+
+    def __init__(self, mode="live", path=None, fast=False):
+        self.mode = mode
+        self.fast = fast
+        self.seed = None
+        self.header = {}
+        self.entries = deque()
+        self.log = None
+        self.frames = 0
+        self.pending_quality = None
+        self.frame_started = time.perf_counter()
+        self.polled_at = time.perf_counter_ns()  # When this frame's input was read; starts input-to-sound latencies
+        if mode == "record":
+            self.seed = random.randrange(2 ** 32)
+            self.log = gzip.open(path, "wt", encoding="utf-8")
+        elif mode == "replay":
+            self.entries = self.read_log(path)
+            self.header = self.entries.popleft()
+            self.seed = self.header["seed"]
+
+    @staticmethod
+    def read_log(path):
+        """Read a recording; a log cut short by a crash is replayed up to its last complete line."""
+        entries = deque()
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entries.append(json.loads(line))
+        except (EOFError, OSError, ValueError) as e:
+            if not entries:
+                raise
+            print(f"Снимак {path} је непотпун ({e}); пушта се до последњег целог реда.")
+        return entries
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def start(self, settings, teams, quality):
+        """Seed the game's RNG and, when recording, write the log header."""
+        if self.seed is not None:
+            random.seed(self.seed)
+        if self.mode == "record":
+            self.header = {"version": 1, "seed": self.seed, "settings": settings, "teams": list(teams),
+                           "quality": quality, "pygame": pygame.version.ver}
+            self.write(self.header)
+
+    def write(self, entry):
+        self.log.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def encode(self, event):
+        fields = {name: getattr(event, name) for name in self.EVENT_FIELDS if hasattr(event, name)}
+        return [event.type, fields]
+
+    @staticmethod
+    def decode(item):
+        event_type, fields = item
+        return pygame.event.Event(event_type, {name: tuple(value) if isinstance(value, list) else value
+                                               for name, value in fields.items()})
+
+    def next_entry(self, kind):
+        """Pop the next log entry, which must be of `kind`; otherwise the replay ends and input goes live."""
+        while self.entries and isinstance(self.entries[0], dict) and "video" in self.entries[0]:
+            self.entries.popleft()  # A video frame this replay does not stream
+        if self.entries and isinstance(self.entries[0], kind):
+            return self.entries.popleft()
+        if self.entries:
+            print(f"Снимак се разишао са игром после {self.frames} фрејмова; наставља се уживо.")
+        else:
+            print(f"Снимак је одигран до краја ({self.frames} фрејмова); наставља се уживо.")
+        self.mode = "live"
+        self.entries.clear()
+        return None
+
+    def events(self):
+        """This frame's input events."""
+        self.polled_at = time.perf_counter_ns()
+        events = pygame.event.get()
+        if self.mode == "replay":
+            # Live input is drained so the window stays responsive; only closing it is honored
+            if any(event.type == QUIT for event in events):
+                return [pygame.event.Event(QUIT)]
+            entry = self.next_entry(list)
+            if entry is not None:
+                return [self.decode(item) for item in entry]
+        elif self.mode == "record":
+            # Mouse motion only matters while dragging a slider
+            recorded = [event for event in events if event.type in self.RECORDED_TYPES
+                        and (event.type != MOUSEMOTION or event.buttons[0])]
+            self.write([self.encode(event) for event in recorded])
+            if recorded:
+                self.log.flush()
+        return events
+
+    def tick(self, clock, framerate):
+        """End the frame and return its duration in ms."""
+        self.frames += 1
+        if self.mode == "replay":
+            dt = self.next_entry(int)
+            if dt is not None:
+                if self.entries and isinstance(self.entries[0], dict) and "quality" in self.entries[0]:
+                    self.pending_quality = self.entries.popleft()["quality"]
+                if not self.fast:
+                    # Hold each frame for its recorded duration
+                    remaining = dt / 1000 - (time.perf_counter() - self.frame_started)
+                    if remaining > 0:
+                        time.sleep(remaining)
+                clock.tick()
+                self.frame_started = time.perf_counter()
+                return dt
+        dt = clock.tick(framerate)
+        if self.mode == "record":
+            self.write(dt)
+        return dt
+
+    def recorded(self, key, produce):
+        """A value from `produce()`, logged when recording; a replay takes the logged value instead."""
+        if self.mode == "replay":
+            entry = self.next_entry(dict)
+            if entry is not None and key in entry:
+                return entry[key]
+        value = produce()
+        if self.mode == "record":
+            self.write({key: value})
+        return value
+
+    def upcoming(self, key, index=0):
+        """The `index`-th value still to come under `key` in the replayed log (None when live or past the end)."""
+        if self.mode != "replay":
+            return None
+        for entry in self.entries:
+            if isinstance(entry, dict) and key in entry:
+                if index == 0:
+                    return entry[key]
+                index -= 1
+        return None
+
+    def record_video(self, sequence):
+        if self.mode == "record":
+            self.write({"video": sequence})
+
+    def take_video(self):
+        """The streamed video frame the recorded game put on screen at this point, if any."""
+        if self.mode == "replay" and self.entries and isinstance(self.entries[0], dict) and "video" in self.entries[0]:
+            return self.entries.popleft()["video"]
+        return None
+
+    def record_quality(self, name):
+        if self.mode == "record":
+            self.write({"quality": name})
+
+    def take_quality(self):
+        """The quality level the recorded game switched to at the end of this frame, if any."""
+        name, self.pending_quality = self.pending_quality, None
+        return name
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+class QuestionBank:
+    """Questions in an indexed SQLite file, drawn at random without repeats; also the compiled question pack."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            question TEXT NOT NULL UNIQUE,
+            category TEXT NOT NULL DEFAULT '',
+            difficulty INTEGER NOT NULL DEFAULT 1,
+            used INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS answers (
+            question_id INTEGER NOT NULL REFERENCES questions(id),
+            position INTEGER NOT NULL,
+            answer TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (question_id, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS pools (
+            pool TEXT PRIMARY KEY,
+            size INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS pool_slots (
+            pool TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            PRIMARY KEY (pool, slot)
+        ) WITHOUT ROWID;
+        CREATE UNIQUE INDEX IF NOT EXISTS pool_slots_question ON pool_slots (question_id, pool);
+        CREATE TABLE IF NOT EXISTS sources (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            question_id INTEGER,
+            issues TEXT NOT NULL DEFAULT '[]'
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=QUESTION_DB):
+        # Draws happen on the round prefetcher's thread; the game never uses the bank from two threads at once
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        # Own generator: drawing a question must not shift the game's seeded random sequence
+        self.rng = random.Random()
+
+    @staticmethod
+    def pool_key(category="", difficulty=0):
+        """Pool for a filter; an empty category or a difficulty of 0 means any."""
+        parts = ([f"c:{category}"] if category else []) + ([f"d:{difficulty}"] if difficulty else [])
+        return "|".join(parts) or "*"
+
+    def pools_of(self, category, difficulty):
+        return {self.pool_key(), self.pool_key(category), self.pool_key("", difficulty),
+                self.pool_key(category, difficulty)}
+
+    def available(self, category="", difficulty=0):
+        row = self.conn.execute("SELECT size FROM pools WHERE pool = ?",
+                                (self.pool_key(category, difficulty),)).fetchone()
+        return row[0] if row else 0
+
+    def total(self):
+        return self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def add_question(self, question, answers, category="", difficulty=1):
+        """Add a question with its answers; returns its id, or None if the same question text is already in the bank."""
+        cursor = self.conn.execute("INSERT OR IGNORE INTO questions (question, category, difficulty) VALUES (?, ?, ?)",
+                                   (question, category, difficulty))
+        if cursor.rowcount == 0:
+            return None
+        question_id = cursor.lastrowid
+        self.conn.executemany("INSERT INTO answers (question_id, position, answer, points) VALUES (?, ?, ?, ?)",
+                              [(question_id, i, a["answer"], a["points"]) for i, a in enumerate(answers)])
+        self.add_to_pools(question_id, category, difficulty)
+        return question_id
+
+    def remove_question(self, question_id):
+        self.remove_from_pools(question_id)
+        self.conn.execute("DELETE FROM answers WHERE question_id = ?", (question_id,))
+        self.conn.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+
+    def add_to_pools(self, question_id, category, difficulty):
+        for pool in self.pools_of(category, difficulty):
+            self.conn.execute("INSERT INTO pools (pool, size) VALUES (?, 0) ON CONFLICT (pool) DO NOTHING", (pool,))
+            self.conn.execute("INSERT INTO pool_slots (pool, slot, question_id) "
+                              "SELECT pool, size, ? FROM pools WHERE pool = ?", (question_id, pool))
+            self.conn.execute("UPDATE pools SET size = size + 1 WHERE pool = ?", (pool,))
+
+    def remove_from_pools(self, question_id):
+        slots = self.conn.execute("SELECT pool, slot FROM pool_slots WHERE question_id = ?", (question_id,)).fetchall()
+        for pool, slot in slots:
+            self.conn.execute("DELETE FROM pool_slots WHERE pool = ? AND slot = ?", (pool, slot))
+            # Move the pool's last question into the hole so slots stay dense
+            self.conn.execute("UPDATE pool_slots SET slot = ? WHERE pool = ? AND slot = "
+                              "(SELECT size - 1 FROM pools WHERE pool = ?)", (slot, pool, pool))
+            self.conn.execute("UPDATE pools SET size = size - 1 WHERE pool = ?", (pool,))
+
+    def draw(self, category="", difficulty=0):
+        """Take a random unused question matching the filter and mark it used; None if there is none."""
+        pool = self.pool_key(category, difficulty)
+        size = self.available(category, difficulty)
+        if size == 0:
+            return None
+        question_id, = self.conn.execute("SELECT question_id FROM pool_slots WHERE pool = ? AND slot = ?",
+                                         (pool, self.rng.randrange(size))).fetchone()
+        self.conn.execute("UPDATE questions SET used = 1 WHERE id = ?", (question_id,))
+        self.remove_from_pools(question_id)
+        self.conn.commit()
+        return self.get(question_id)
+
+    def release(self, question_id):
+        """Put a drawn but unplayed question back among the unused ones."""
+        row = self.conn.execute("SELECT category, difficulty FROM questions WHERE id = ? AND used = 1",
+                                (question_id,)).fetchone()
+        if row is not None:
+            self.conn.execute("UPDATE questions SET used = 0 WHERE id = ?", (question_id,))
+            self.add_to_pools(question_id, *row)
+            self.conn.commit()
+
+    def get(self, question_id):
+        question, category, difficulty = self.conn.execute(
+            "SELECT question, category, difficulty FROM questions WHERE id = ?", (question_id,)).fetchone()
+        answers = [{"answer": answer, "points": points} for answer, points in self.conn.execute(
+            "SELECT answer, points FROM answers WHERE question_id = ? ORDER BY position", (question_id,))]
+        return {"id": question_id, "question": question, "category": category, "difficulty": difficulty,
+                "answers": answers}
+
+    def reset(self):
+        """Mark every question unused again and rebuild the pools."""
+        self.conn.execute("DELETE FROM pool_slots")
+        self.conn.execute("DELETE FROM pools")
+        self.conn.execute("UPDATE questions SET used = 0")
+        for question_id, category, difficulty in self.conn.execute(
+                "SELECT id, category, difficulty FROM questions ORDER BY id").fetchall():
+            self.add_to_pools(question_id, category, difficulty)
+        self.conn.commit()
+
+    def import_files(self, paths, category="", difficulty=1):
+        """Import question files in the questions/*.txt format, skipping files with errors; returns how many were added."""
+        added = 0
+        for path in paths:
+            result = compile_question_file(path)
+            for line in format_lint_report([(path,) + issue for issue in result["issues"]]):
+                print(line)
+            if any(severity == "error" for severity, _, _ in result["issues"]):
+                continue
+            added += self.add_question(result["question"], result["answers"], category, difficulty) is not None
+        self.conn.commit()
+        return added
+
+    def compile(self, directory, workers=None):
+        """Bring the bank in line with the question files under `directory`; returns how many files changed."""
+        found = {}
+        bundled = {}  # path -> name in the asset bundle, when the folder is not on disk
+        bundle = None if os.path.isdir(directory) else ASSETS.get_bundle()
+        if bundle is not None:
+            for name, (mtime, size) in bundle.files(directory, ".txt").items():
+                path = os.path.join(directory, *name[len(directory.rstrip("/")) + 1:].split("/"))
+                category = os.path.dirname(os.path.relpath(path, directory)).replace(os.sep, "/")
+                found[path] = (mtime, size, category)
+                bundled[path] = name
+        for root, _dirs, names in os.walk(directory):
+            category = os.path.relpath(root, directory).replace(os.sep, "/")
+            for name in names:
+                if name.endswith(".txt"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    found[path] = (stat.st_mtime_ns, stat.st_size, "" if category == "." else category)
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT path, mtime_ns, size, digest, question_id FROM sources")}
+        removed = [path for path in known if path not in found]
+        for path in removed:
+            if known[path][3] is not None:
+                self.remove_question(known[path][3])
+            self.conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+        changed = sorted(path for path, (mtime, size, _) in found.items() if known.get(path, (None, None))[:2] != (mtime, size))
+        workers = workers or os.cpu_count() or 1
+        if bundled:
+            results = [compile_question_data(path, bundle.read(bundled[path]), *found[path][:2]) for path in changed]
+        elif workers > 1 and len(changed) >= COMPILE_PARALLEL_FILES:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(compile_question_file, changed, chunksize=max(1, len(changed) // (workers * 4))))
+        else:
+            results = [compile_question_file(path) for path in changed]
+        for result in results:
+            self.update_source(result, found[result["path"]][2], known.get(result["path"]))
+        self.conn.commit()
+        return len(changed) + len(removed)
+
+    def update_source(self, result, category, known):
+        """Store one compiled file: replace its old question unless only its mtime changed."""
+        question_id = known[3] if known else None
+        issues = result["issues"]
+        if known is None or known[2] != result["digest"]:
+            if question_id is not None:
+                self.remove_question(question_id)
+                question_id = None
+            if not any(severity == "error" for severity, _, _ in issues):
+                question_id = self.add_question(result["question"], result["answers"], category)
+                if question_id is None:
+                    existing, = self.conn.execute("SELECT id FROM questions WHERE question = ?",
+                                                  (result["question"],)).fetchone()
+                    owner = self.conn.execute("SELECT path FROM sources WHERE question_id = ?", (existing,)).fetchone()
+                    if owner is None:
+                        # Imported before the file was compiled: the file takes the question over
+                        self.remove_question(existing)
+                        question_id = self.add_question(result["question"], result["answers"], category)
+                    else:
+                        issues = issues + [("warning", 1, f"исто питање већ постоји у {owner[0]}; прескаче се")]
+        self.conn.execute("INSERT OR REPLACE INTO sources (path, mtime_ns, size, digest, question_id, issues) "
+                          "VALUES (?, ?, ?, ?, ?, ?)", (result["path"], result["mtime_ns"], result["size"],
+                                                        result["digest"], question_id, json.dumps(issues, ensure_ascii=False)))
+
+    def point_lists(self):
+        """(question, answer points) of every question in the bank, for the simulator."""
+        questions = OrderedDict()
+        for question, points in self.conn.execute("SELECT q.question, a.points FROM questions q JOIN answers a "
+                                                  "ON a.question_id = q.id ORDER BY q.id, a.position"):
+            questions.setdefault(question, []).append(points)
+        return list(questions.items())
+
+    def lint_issues(self):
+        """(path, severity, line, message) for every compiled file, without reading the files again."""
+        return [(path,) + tuple(issue) for path, issues in self.conn.execute(
+            "SELECT path, issues FROM sources WHERE issues != '[]' ORDER BY path") for issue in json.loads(issues)]
+
+    def close(self):
+        self.conn.close()
+
+class RoundPrefetcher:
+    """Prepares upcoming rounds, in order, on a background thread while the current one is played."""
+    def __init__(self, prepare, depth=1):
+        self.prepare = prepare
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = OrderedDict()  # round number -> future
+        self.timings = {}  # round number -> seconds spent preparing
+        self.waits = {}  # round number -> seconds the game had to wait for it
+
+    def timed(self, round_num, entry):
+        start = time.perf_counter()
+        result = self.prepare(round_num, entry)
+        self.timings[round_num] = time.perf_counter() - start
+        return result
+
+    def schedule(self, round_num, entry=None):
+        if round_num not in self.pending:
+            self.pending[round_num] = self.executor.submit(self.timed, round_num, entry)
+
+    def take(self, round_num):
+        """The prepared round, waiting for it if it is still loading; None if it was never scheduled."""
+        future = self.pending.pop(round_num, None)
+        if future is None:
+            return None
+        if not future.done():
+            start = time.perf_counter()
+            result = future.result()
+            self.waits[round_num] = time.perf_counter() - start
+            print(f"Рунда {round_num} није била спремна; чекано {self.waits[round_num] * 1000:.1f} ms.")
+            return result
+        return future.result()
+
+    def status(self):
+        """[(round number, state)] for the rounds prepared ahead, in order."""
+        return [(round_num, "ready" if future.done() else "loading" if future.running() else "queued")
+                for round_num, future in self.pending.items()]
+
+    def report(self):
+        for round_num, seconds in sorted(self.timings.items()):
+            wait = self.waits.get(round_num)
+            note = f", чекано {wait * 1000:.1f} ms" if wait is not None else ""
+            print(f"Рунда {round_num} припремљена у позадини за {seconds * 1000:.1f} ms{note}")
+
+    def shutdown(self):
+        """Stop the worker and return the prepared rounds that were never taken."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        leftovers = [future.result() for future in self.pending.values()
+                     if future.done() and not future.cancelled() and future.exception() is None]
+        self.pending.clear()
+        return [result for result in leftovers if result is not None]
+
+class AudioEngine:
+    """Sound effects on reserved mixer channels, streamed game music and a preloaded victory track."""
+    def __init__(self, sounds, music_path):
+        self.sounds = sounds
+        self.music_path = music_path
+        reserved = max(index for indices in EFFECT_CHANNELS.values() for index in indices) + 1
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), reserved + 4))
+        pygame.mixer.set_reserved(reserved)
+        self.channels = {name: [pygame.mixer.Channel(i) for i in indices] for name, indices in EFFECT_CHANNELS.items()}
+        self.turn = dict.fromkeys(EFFECT_CHANNELS, 0)
+        frequency = pygame.mixer.get_init()[0]
+        self.buffer_ms = AUDIO_BUFFER / frequency * 1000
+        self.debug_hook = None
+        self.latencies = []
+        if music_path:
+            # The mixer streams from this source, so an in-memory one has to stay referenced
+            self.music_source = ASSETS.source(music_path)
+            pygame.mixer.music.load(self.music_source, os.path.splitext(music_path)[1][1:])
+
+    def set_volumes(self, effects, music):
+        """Volumes from 0 to 1; the strike sound is kept quieter than the others."""
+        for name, volume in (("correct", effects), ("wrong", 0.4 * effects), ("victory", music)):
+            if self.sounds.get(name):
+                self.sounds[name].set_volume(volume)
+        pygame.mixer.music.set_volume(music)
+
+    def play(self, name, loops=0, since=None):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        channels = self.channels[name]
+        channels[self.turn[name] % len(channels)].play(sound, loops)
+        self.turn[name] += 1
+        if self.debug_hook is not None and since is not None:
+            self.debug_hook(name, since, time.perf_counter_ns(), self.buffer_ms)
+
+    def start_music(self):
+        for channel in self.channels["victory"]:
+            channel.stop()
+        if self.music_path:
+            pygame.mixer.music.play(-1)
+
+    def play_victory(self):
+        pygame.mixer.music.fadeout(300)
+        self.play("victory", loops=-1)  # Loops until the next game
+
+    def record_latency(self, name, since, dispatched, buffer_ms):
+        """The built-in debug hook: collects input-to-mixer latencies for report()."""
+        self.latencies.append((dispatched - since) / 1e6)
+
+    def report(self):
+        if not self.latencies:
+            return
+        samples = sorted(self.latencies)
+        p50, p95 = percentile(samples, 50), percentile(samples, 95)
+        print(f"Звук: {len(samples)} ефеката, од уноса до миксера p50 {p50:.1f} ms, p95 {p95:.1f} ms "
+              f"(до звучника још процењених највише {self.buffer_ms:.1f} ms бафера миксера)")
+
+# Buzzer datagrams, one ASCII message each; BUZZ is resent until its ACK, repeated sequence numbers are ignored:
+#   client: HELLO <id> <team>, BUZZ <seq>, PONG <token>
+#   server: WELCOME <id>, ACK <seq>, PING <token>, RESULT <team> <id>
+class BuzzerServer(asyncio.DatagramProtocol):
+    """UDP buzzer server for the LAN; the earliest press, corrected for its link delay, wins a face-off."""
+    def __init__(self, host="0.0.0.0", port=7777, window_ms=40, post=None):
+        self.window_ms = window_ms
+        self.post = post or pygame.event.post
+        self.clients = {}  # address -> {"id", "team", "seq", "rtts"}
+        self.presses = []
+        self.armed = False
+        self.latencies = []  # Press to screen, in ms
+        self.results = 0
+        self.transport = None
+        self.error = None
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.serve, args=(host, port), daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            self.thread.join()
+            raise self.error
+
+    def serve(self, host, port):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.loop.create_datagram_endpoint(lambda: self, local_addr=(host, port)))
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            self.loop.close()
+            return
+        self.port = self.transport.get_extra_info("sockname")[1]
+        self.loop.call_later(BUZZER_PING_MS / 1000, self.ping_all)
+        self.ready.set()
+        self.loop.run_forever()
+        self.transport.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        now = time.monotonic_ns()
+        parts = data.decode("ascii", "replace").split()
+        client = self.clients.get(addr)
+        if len(parts) == 3 and parts[0] == "HELLO" and parts[2] in ("1", "2"):
+            self.clients[addr] = {"id": parts[1], "team": int(parts[2]), "seq": -1, "rtts": deque(maxlen=8)}
+            self.transport.sendto(f"WELCOME {parts[1]}".encode(), addr)
+            self.transport.sendto(f"PING {time.monotonic_ns()}".encode(), addr)
+        elif client is None or len(parts) != 2 or not parts[1].isdigit():
+            return
+        elif parts[0] == "PONG":
+            client["rtts"].append(now - int(parts[1]))
+        elif parts[0] == "BUZZ":
+            seq = int(parts[1])
+            self.transport.sendto(f"ACK {seq}".encode(), addr)
+            if seq <= client["seq"]:
+                return
+            client["seq"] = seq
+            if not self.armed:
+                return
+            # The fastest of the recent pings is the best estimate of the link's own delay
+            one_way = min(client["rtts"]) // 2 if client["rtts"] else 0
+            self.presses.append((now - one_way, client["team"], client["id"]))
+            if len(self.presses) == 1:
+                self.loop.call_later(self.window_ms / 1000, self.decide)
+
+    def ping_all(self):
+        token = f"PING {time.monotonic_ns()}".encode()
+        for addr in self.clients:
+            self.transport.sendto(token, addr)
+        self.loop.call_later(BUZZER_PING_MS / 1000, self.ping_all)
+
+    def decide(self):
+        if not self.armed or not self.presses:
+            return
+        pressed_at, team, client_id = min(self.presses)
+        self.armed = False
+        self.presses = []
+        self.results += 1
+        for addr in self.clients:
+            self.transport.sendto(f"RESULT {team} {client_id}".encode(), addr)
+        self.post(pygame.event.Event(BUZZER_EVENT, team=team, client=client_id, pressed_at=pressed_at))
+
+    def set_armed(self, armed):
+        self.armed = armed
+        self.presses = []
+
+    def arm(self):
+        """Accept presses for a face-off (from the game thread)."""
+        self.loop.call_soon_threadsafe(self.set_armed, True)
+
+    def disarm(self):
+        self.loop.call_soon_threadsafe(self.set_armed, False)
+
+    def record_latency(self, pressed_at):
+        """Note the time from a press to the frame that showed its result."""
+        self.latencies.append((time.monotonic_ns() - pressed_at) / 1e6)
+
+    def report(self):
+        if not self.latencies:
+            return
+        samples = sorted(self.latencies)
+        p50, p95 = percentile(samples, 50), percentile(samples, 95)
+        print(f"Зујалице: {len(self.clients)} повезано, {self.results} одлука; од притиска до екрана "
+              f"p50 {p50:.1f} ms, p95 {p95:.1f} ms")
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+class BuzzerClient(asyncio.DatagramProtocol):
+    """Stand-in buzzer for testing the server, with `delay_ms` of link delay each way."""
+    def __init__(self, client_id, team, delay_ms=0):
+        self.client_id = client_id
+        self.team = team
+        self.delay = delay_ms / 1000
+        self.transport = None
+        self.seq = 0
+        self.acked = set()
+        self.welcome = asyncio.get_running_loop().create_future()
+        self.results = asyncio.Queue()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.send(f"HELLO {self.client_id} {self.team}")
+
+    def send(self, message):
+        asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, message.encode())
+
+    def datagram_received(self, data, addr):
+        asyncio.get_running_loop().call_later(self.delay, self.handle, data.decode("ascii").split())
+
+    def handle(self, parts):
+        if parts[0] == "WELCOME" and not self.welcome.done():
+            self.welcome.set_result(True)
+        elif parts[0] == "PING":
+            self.send(f"PONG {parts[1]}")
+        elif parts[0] == "ACK":
+            self.acked.add(int(parts[1]))
+        elif parts[0] == "RESULT":
+            self.results.put_nowait((int(parts[1]), parts[2], time.monotonic_ns()))
+
+    async def buzz(self):
+        self.seq += 1
+        seq = self.seq
+        while seq not in self.acked:
+            self.send(f"BUZZ {seq}")
+            await asyncio.sleep(max(0.05, self.delay * 4))
+
+async def simulate_buzzers(port, clients=24, faceoffs=20, max_delay_ms=15, spread_ms=20, arm=None):
+    """Face-offs of `clients` stand-in buzzers on localhost; returns (decided, wrong, close calls, latencies in ms)."""
+    loop = asyncio.get_running_loop()
+    rng = random.Random(0)
+    buzzers = []
+    for number in range(clients):
+        _, client = await loop.create_datagram_endpoint(
+            lambda number=number: BuzzerClient(f"b{number}", number % 2 + 1, rng.uniform(0, max_delay_ms)),
+            remote_addr=("127.0.0.1", port))
+        buzzers.append(client)
+    await asyncio.gather(*(client.welcome for client in buzzers))
+    # Let every client answer a few pings so the server knows its delay
+    await asyncio.sleep(BUZZER_PING_MS / 1000 * 3)
+    decided, wrong, close, latencies = 0, 0, 0, []
+    for _ in range(faceoffs):
+        arm()
+        await asyncio.sleep(0.05)
+        offsets = [rng.uniform(0, spread_ms) for _ in buzzers]
+        pressed = {}  # client id -> when it actually pressed, which the event loop's timers may delay
+
+        async def press(client, offset):
+            await asyncio.sleep(offset / 1000)
+            pressed[client.client_id] = time.monotonic_ns()
+            await client.buzz()
+
+        presses = [asyncio.create_task(press(client, offset)) for client, offset in zip(buzzers, offsets)]
+        results = [await client.results.get() for client in buzzers]
+        await asyncio.gather(*presses)
+        team, winner_id, received = results[0]
+        (first, expected), (second, _) = sorted((at, client_id) for client_id, at in pressed.items())[:2]
+        decided += 1
+        if winner_id != expected:
+            if (second - first) / 1e6 < BUZZER_TEST_MARGIN_MS:
+                close += 1
+            else:
+                wrong += 1
+        latencies.append((received - first) / 1e6)
+    for client in buzzers:
+        client.transport.close()
+    return decided, wrong, close, latencies
+
+class SpectatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64  # A hall full of screens connecting at once must not be refused
+
+class SpectatorHandler(BaseHTTPRequestHandler):
+    """The spectator page, the latest frame as /frame.jpg and the MJPEG stream /stream.mjpg."""
+    def do_GET(self):
+        stream = self.server.stream
+        path = self.path.split("?")[0]
+        if path == "/":
+            body = SPECTATOR_PAGE.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/frame.jpg":
+            _, jpeg, _ = stream.wait_frame(0)
+            if jpeg is None:
+                self.send_error(503)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+        elif path == "/stream.mjpg":
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            stream.add_viewer(1)
+            try:
+                seq = 0
+                while True:
+                    # A slow viewer skips to the newest frame instead of queueing old ones
+                    seq, jpeg, part = stream.wait_frame(seq)
+                    if jpeg is None:
+                        break
+                    self.wfile.write(part)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                stream.add_viewer(-1)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+class SpectatorStream:
+    """Serves the composed screen as MJPEG over HTTP, captured at most `fps` times a second and encoded once."""
+    def __init__(self, host="0.0.0.0", port=8080, fps=15, quality=75, max_width=1280):
+        import cv2  # Comes with the video background; the stream cannot run without it
+        import numpy as np
+        self.cv2 = cv2
+        self.np = np
+        self.interval = 1 / fps if fps > 0 else 0
+        self.quality = quality
+        self.max_width = max_width
+        self.last_capture = 0
+        self.write = self.ready = self.read = None
+        self.order = None
+        self.fresh = False
+        self.closed = False
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.jpeg = None
+        self.part = None  # The JPEG as a multipart/x-mixed-replace part, built once for all viewers
+        self.viewers = 0
+        self.peak_viewers = 0
+        self.capture_times = deque(maxlen=PROFILER_WINDOW)
+        self.encoded = 0
+        self.httpd = SpectatorServer((host, port), SpectatorHandler)
+        self.httpd.stream = self
+        self.port = self.httpd.server_address[1]
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.encoder = threading.Thread(target=self.encode_loop, daemon=True)
+        self.encoder.start()
+
+    def capture(self, surface):
+        now = time.perf_counter()
+        if now - self.last_capture < self.interval:
+            return
+        self.last_capture = now
+        np = self.np
+        width, height = surface.get_size()
+        step = max(1, -(-width // self.max_width)) if self.max_width > 0 else 1
+        if surface.get_bytesize() == 4:
+            view = surface.get_view("2")
+            # The view is column-major; transposed it matches the surface's rows, so this is one copy
+            pixels = np.asarray(view).T[::step, ::step]
+            if self.order is None:
+                # cv2 wants blue, green, red; find those bytes in the surface's 32-bit pixels
+                shifts = surface.get_shifts()[2::-1]
+                self.order = [shift // 8 if sys.byteorder == "little" else 3 - shift // 8 for shift in shifts]
+        else:
+            # 24-bit and paletted displays have no 32-bit pixel view; take a slower RGB copy
+            view = None
+            pixels = np.frombuffer(pygame.image.tobytes(surface, "RGB"), np.uint8).reshape(height, width, 3)[::step, ::step]
+        if self.write is None or self.write.shape != pixels.shape:
+            self.write = np.empty(pixels.shape, pixels.dtype)
+        np.copyto(self.write, pixels)
+        del view, pixels  # Releases the surface lock
+        with self.cond:
+            self.write, self.ready = self.ready, self.write
+            self.fresh = True
+            self.cond.notify_all()
+        self.capture_times.append((time.perf_counter() - now) * 1000)
+
+    def encode_loop(self):
+        while True:
+            with self.cond:
+                while not self.fresh and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                self.read, self.ready = self.ready, self.read
+                self.fresh = False
+                frame, order = self.read, self.order
+            # cvtColor lets go of the GIL, so the render thread is not held up while a frame converts
+            if frame.ndim == 3:
+                pixels = self.cv2.cvtColor(frame, self.cv2.COLOR_RGB2BGR)
+            elif order in ([0, 1, 2], [2, 1, 0]):
+                pixels = self.cv2.cvtColor(frame.view(self.np.uint8).reshape(frame.shape[0], frame.shape[1], 4),
+                                           self.cv2.COLOR_BGRA2BGR if order == [0, 1, 2] else self.cv2.COLOR_RGBA2BGR)
+            else:
+                pixels = frame.view(self.np.uint8).reshape(frame.shape[0], frame.shape[1], 4)[:, :, order]
+            ok, jpeg = self.cv2.imencode(".jpg", pixels, [self.cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            jpeg = jpeg.tobytes()
+            part = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n%s\r\n" % (len(jpeg), jpeg)
+            with self.cond:
+                self.jpeg, self.part = jpeg, part
+                self.seq += 1
+                self.encoded += 1
+                self.cond.notify_all()
+
+    def wait_frame(self, after):
+        """(seq, JPEG, stream part) of the first frame newer than `after`; the JPEG is None once closed."""
+        with self.cond:
+            while self.seq <= after and not self.closed:
+                self.cond.wait()
+            if self.closed:
+                return self.seq, None, None
+            return self.seq, self.jpeg, self.part
+
+    def add_viewer(self, count):
+        with self.cond:
+            self.viewers += count
+            self.peak_viewers = max(self.peak_viewers, self.viewers)
+
+    def report(self):
+        if not self.capture_times:
+            return
+        samples = sorted(self.capture_times)
+        p50, p95 = percentile(samples, 50), percentile(samples, 95)
+        print(f"Пренос за гледаоце: {self.encoded} кадрова, највише {self.peak_viewers} гледалаца; "
+              f"снимање кадра p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+    def close(self):
+        if self.closed:
+            return
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.encoder.join()
+
+class RoundState:
+    """The rules of one round without any display: reveals, strikes and the steal."""
+    __slots__ = ("points", "active_team", "revealed", "strikes", "state", "team1_round", "team2_round")
+
+    def __init__(self, points, active_team):
+        self.points = points
+        self.active_team = active_team
+        self.revealed = 0
+        self.strikes = 0
+        self.state = "active" if points else "round_over"
+        self.team1_round = 0
+        self.team2_round = 0
+
+    @classmethod
+    def restore(cls, points, current):
+        """The round in progress of GameJournal.resume_state()."""
+        round_state = cls(points, current["team"])
+        for index in current["revealed"]:
+            round_state.revealed |= 1 << index
+        round_state.strikes, round_state.state = current["strikes"], current["state"]
+        round_state.team1_round, round_state.team2_round = current["team1_round"], current["team2_round"]
+        if round_state.state == "active" and round_state.all_revealed():
+            round_state.state = "round_over"
+        return round_state
+
+    def is_revealed(self, index):
+        return bool(self.revealed >> index & 1)
+
+    def all_revealed(self):
+        return self.revealed == (1 << len(self.points)) - 1
+
+    def snapshot(self):
+        """The state after a move, as stored with the journal's board events."""
+        return {"strikes": self.strikes, "state": self.state,
+                "team1_round": self.team1_round, "team2_round": self.team2_round}
+
+    def reveal(self, index):
+        if not 0 <= index < len(self.points) or self.revealed >> index & 1 or self.state == "round_over":
+            return None
+        self.revealed |= 1 << index
+        points = self.points[index]
+        if self.state == "active":
+            if self.active_team == 1:
+                self.team1_round += points
+            else:
+                self.team2_round += points
+            if self.all_revealed():
+                self.state = "round_over"
+            return "reveal"
+        # A steal: the other team takes everything the playing team collected, plus this answer
+        if self.active_team == 1:
+            self.team1_round, self.team2_round = 0, self.team1_round + points
+        else:
+            self.team1_round, self.team2_round = self.team2_round + points, 0
+        self.state = "round_over"
+        return "steal"
+
+    def strike(self):
+        if self.state == "active":
+            self.strikes += 1
+            if self.strikes >= 3:
+                self.state = "round_over" if self.all_revealed() else "opponent"
+            return "strike"
+        if self.state == "opponent":
+            self.state = "round_over"
+            return "steal"
+        return None
+
+class GameJournal:
+    """Journal of game events and the statistics tables in family_feud.db, written by a background thread."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            started_at REAL NOT NULL,
+            team1 TEXT NOT NULL,
+            team2 TEXT NOT NULL,
+            finished INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            game_id INTEGER NOT NULL REFERENCES games(id),
+            round_number INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            data TEXT NOT NULL,
+            at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_game ON events (game_id, id);
+        CREATE INDEX IF NOT EXISTS events_round ON events (game_id, round_number);
+        CREATE INDEX IF NOT EXISTS games_unfinished ON games (id) WHERE finished = 0;
+        CREATE TABLE IF NOT EXISTS rounds (
+            game_id INTEGER NOT NULL REFERENCES games(id),
+            round_number INTEGER NOT NULL,
+            team1_points INTEGER,
+            team2_points INTEGER,
+            PRIMARY KEY (game_id, round_number)
+        );
+    """
+    STATS_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS team_stats (
+            team TEXT PRIMARY KEY,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0,
+            rounds INTEGER NOT NULL DEFAULT 0,
+            points INTEGER NOT NULL DEFAULT 0,
+            steals INTEGER NOT NULL DEFAULT 0,
+            steals_won INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS team_stats_rank ON team_stats (wins DESC, points DESC);
+        CREATE TABLE IF NOT EXISTS question_stats (
+            question TEXT PRIMARY KEY,
+            plays INTEGER NOT NULL DEFAULT 0,
+            answers INTEGER NOT NULL DEFAULT 0,
+            found INTEGER NOT NULL DEFAULT 0,
+            strikes INTEGER NOT NULL DEFAULT 0,
+            steals INTEGER NOT NULL DEFAULT 0,
+            steals_won INTEGER NOT NULL DEFAULT 0,
+            points INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS question_stats_found ON question_stats ((found * 1.0 / answers));
+        CREATE INDEX IF NOT EXISTS question_stats_steals ON question_stats ((steals * 1.0 / plays));
+        CREATE TABLE IF NOT EXISTS answer_stats (
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            points INTEGER NOT NULL,
+            shown INTEGER NOT NULL DEFAULT 0,
+            found INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (question, answer)
+        );
+        CREATE INDEX IF NOT EXISTS answer_stats_found ON answer_stats ((found * 1.0 / shown));
+    """
+
+    def __init__(self, path=GAME_DB, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.game_id = None
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closing = threading.Event()
+        self.thread = None
+        self.conn = None
+        self.written = 0
+        self.batches = 0
+        if not enabled:
+            return
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(rounds)")]
+        if columns and "game_id" not in columns:
+            # Before the journal the rounds table only ever held the last game, wiped on every start
+            self.conn.execute("DROP TABLE rounds")
+        self.conn.executescript(self.SCHEMA)
+        has_stats = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'team_stats'").fetchone()
+        self.conn.executescript(self.STATS_SCHEMA)
+        if not has_stats:
+            # Journals written before the statistics tables existed
+            self.rebuild_stats()
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def start_game(self, team1, team2):
+        if self.enabled:
+            with self.conn:
+                self.game_id = self.conn.execute("INSERT INTO games (started_at, team1, team2) VALUES (?, ?, ?)",
+                                                 (time.time(), team1, team2)).lastrowid
+
+    def log(self, kind, round_number, **data):
+        """Queue an event; the writer thread serializes and commits it."""
+        if not self.enabled:
+            return
+        with self.cond:
+            self.queue.append((self.game_id, round_number, kind, data, time.time()))
+            self.cond.notify()
+
+    def write_loop(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            with self.cond:
+                while not self.queue and not self.closing.is_set():
+                    self.cond.wait()
+                if not self.queue:
+                    break
+            # Let the events of a burst (a reveal and the round end, say) share one commit
+            self.closing.wait(JOURNAL_FLUSH_MS / 1000)
+            with self.cond:
+                batch = list(self.queue)
+                self.queue.clear()
+            self.write_batch(conn, batch)
+        conn.close()
+
+    def write_batch(self, conn, batch):
+        with conn:
+            conn.executemany("INSERT INTO events (game_id, round_number, kind, data, at) VALUES (?, ?, ?, ?, ?)",
+                             [(game_id, round_number, kind, json.dumps(data, ensure_ascii=False), at)
+                              for game_id, round_number, kind, data, at in batch])
+            for game_id, round_number, kind, data, at in batch:
+                self.apply(conn, game_id, round_number, kind, data)
+        self.written += len(batch)
+        self.batches += 1
+
+    def apply(self, conn, game_id, round_number, kind, data):
+        """Update rounds, games and the statistics tables for an event already in the events table."""
+        if kind == "round_end":
+            conn.execute("INSERT OR REPLACE INTO rounds (game_id, round_number, team1_points, team2_points) "
+                         "VALUES (?, ?, ?, ?)", (game_id, round_number, data["total1"], data["total2"]))
+            self.apply_round_stats(conn, game_id, round_number, data)
+        elif kind == "game_end":
+            conn.execute("UPDATE games SET finished = 1 WHERE id = ?", (game_id,))
+            team1, team2 = conn.execute("SELECT team1, team2 FROM games WHERE id = ?", (game_id,)).fetchone()
+            for team, own, other in ((team1, data["total1"], data["total2"]), (team2, data["total2"], data["total1"])):
+                conn.execute("INSERT INTO team_stats (team, games, wins, draws) VALUES (?, 1, ?, ?) "
+                             "ON CONFLICT (team) DO UPDATE SET games = games + 1, wins = wins + excluded.wins, "
+                             "draws = draws + excluded.draws", (team, int(own > other), int(own == other)))
+
+    def apply_round_stats(self, conn, game_id, round_number, data):
+        active, entry, found, strikes, steals = None, None, set(), 0, []
+        for kind, event in conn.execute("SELECT kind, data FROM events WHERE game_id = ? AND round_number = ? "
+                                        "ORDER BY id", (game_id, round_number)):
+            event = json.loads(event)
+            if kind == "team":
+                active = event["team"]
+            elif kind == "question":
+                entry = event["entry"]
+            elif kind == "strike":
+                strikes += 1
+            elif kind == "steal":
+                steals.append(event["success"])
+            if kind in ("reveal", "steal") and event["index"] is not None:
+                found.add(event["index"])
+        teams = conn.execute("SELECT team1, team2 FROM games WHERE id = ?", (game_id,)).fetchone()
+        for number, (team, points) in enumerate(zip(teams, (data["team1_round"], data["team2_round"])), 1):
+            # Only the team that did not play the round can steal
+            stole = [success for success in steals if number != active]
+            conn.execute("INSERT INTO team_stats (team, rounds, points, steals, steals_won) VALUES (?, 1, ?, ?, ?) "
+                         "ON CONFLICT (team) DO UPDATE SET rounds = rounds + 1, points = points + excluded.points, "
+                         "steals = steals + excluded.steals, steals_won = steals_won + excluded.steals_won",
+                         (team, points, len(stole), sum(stole)))
+        if entry is None:
+            return
+        answers = entry["answers"]
+        conn.execute("INSERT INTO question_stats (question, plays, answers, found, strikes, steals, steals_won, points) "
+                     "VALUES (?, 1, ?, ?, ?, ?, ?, ?) ON CONFLICT (question) DO UPDATE SET plays = plays + 1, "
+                     "answers = answers + excluded.answers, found = found + excluded.found, "
+                     "strikes = strikes + excluded.strikes, steals = steals + excluded.steals, "
+                     "steals_won = steals_won + excluded.steals_won, points = points + excluded.points",
+                     (entry["question"], len(answers), len(found), strikes, len(steals), sum(steals),
+                      data["team1_round"] + data["team2_round"]))
+        conn.executemany("INSERT INTO answer_stats (question, answer, points, shown, found) VALUES (?, ?, ?, 1, ?) "
+                         "ON CONFLICT (question, answer) DO UPDATE SET shown = shown + 1, found = found + excluded.found, "
+                         "points = excluded.points",
+                         [(entry["question"], answer["answer"], answer["points"], int(i in found))
+                          for i, answer in enumerate(answers)])
+
+    def rebuild_stats(self):
+        """Recompute the statistics tables from the raw events."""
+        with self.conn:
+            self.conn.executescript("DELETE FROM team_stats; DELETE FROM question_stats; DELETE FROM answer_stats;")
+            for game_id, round_number, kind, data in self.conn.execute(
+                    "SELECT game_id, round_number, kind, data FROM events WHERE kind IN ('round_end', 'game_end') "
+                    "ORDER BY id").fetchall():
+                self.apply(self.conn, game_id, round_number, kind, json.loads(data))
+
+    def stats(self, limit=10, min_plays=1):
+        """Leaderboard, hardest and most stolen questions and rarest answers, read from the aggregates."""
+        if not self.enabled:
+            return {"teams": [], "hardest": [], "stolen": [], "rarest": []}
+        return {
+            "teams": self.conn.execute(
+                "SELECT team, games, wins, draws, points * 1.0 / MAX(rounds, 1), steals_won FROM team_stats "
+                "ORDER BY wins DESC, points DESC LIMIT ?", (limit,)).fetchall(),
+            "hardest": self.conn.execute(
+                "SELECT question, plays, found * 1.0 / answers FROM question_stats WHERE plays >= ? "
+                "ORDER BY found * 1.0 / answers LIMIT ?", (min_plays, limit)).fetchall(),
+            "stolen": self.conn.execute(
+                "SELECT question, plays, steals * 1.0 / plays, steals_won FROM question_stats WHERE plays >= ? "
+                "AND steals > 0 ORDER BY steals * 1.0 / plays DESC LIMIT ?", (min_plays, limit)).fetchall(),
+            "rarest": self.conn.execute(
+                "SELECT question, answer, points, shown, found * 1.0 / shown FROM answer_stats WHERE shown >= ? "
+                "ORDER BY found * 1.0 / shown LIMIT ?", (min_plays, limit)).fetchall(),
+        }
+
+    def unfinished_game(self):
+        """Id of the latest game that was interrupted after it started, or None."""
+        if not self.enabled:
+            return None
+        row = self.conn.execute("SELECT id FROM games WHERE finished = 0 AND EXISTS "
+                                "(SELECT 1 FROM events WHERE game_id = games.id) ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def resume_state(self, game_id):
+        """Scores, round and board of a game rebuilt from its journal (None for no game)."""
+        if game_id is None:
+            return None
+        team1, team2 = self.conn.execute("SELECT team1, team2 FROM games WHERE id = ?", (game_id,)).fetchone()
+        state = {"game_id": game_id, "team1": team1, "team2": team2, "round": 1, "total1": 0, "total2": 0,
+                 "round_results": [], "current": None}
+        for round_number, kind, data in self.conn.execute(
+                "SELECT round_number, kind, data FROM events WHERE game_id = ? ORDER BY id", (game_id,)):
+            data = json.loads(data)
+            current = state["current"]
+            if kind == "team":
+                state["round"] = round_number
+                state["current"] = {"team": data["team"], "question": None, "revealed": [], "strikes": 0,
+                                    "state": "active", "team1_round": 0, "team2_round": 0}
+            elif kind == "question" and current is not None:
+                current["question"] = data["entry"]
+            elif kind in ("reveal", "strike", "steal") and current is not None:
+                if data.get("index") is not None:
+                    current["revealed"].append(data["index"])
+                for key in ("strikes", "state", "team1_round", "team2_round"):
+                    current[key] = data[key]
+            elif kind == "round_end":
+                state.update(round=round_number + 1, total1=data["total1"], total2=data["total2"], current=None)
+                state["round_results"].append(f"Рунда {round_number}: {data['team1_round']}:{data['team2_round']}")
+        return state
+
+    def close(self):
+        """Write out everything still queued and stop the writer."""
+        if self.thread is not None:
+            self.closing.set()
+            with self.cond:
+                self.cond.notify()
+            self.thread.join()
+            self.thread = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class BoardLayout:
+    """Geometry of the answer board for one question, answer count and screen size."""
+    PADDING = 20
+    GAP = 20
+    ROW_PITCH = 60
+    ROW_HEIGHT = 50
+
+    def __init__(self, screen_size, question_size, answer_count, text_height):
+        screen_width, screen_height = screen_size
+        self.key = (screen_size, question_size, answer_count, text_height)
+        q_box_width = question_size[0] + self.PADDING * 2
+        q_box_height = question_size[1] + self.PADDING * 2
+        total_content_height = q_box_height + self.GAP + answer_count * self.ROW_PITCH
+        question_box_y = (screen_height - total_content_height) // 2 + BOARD_VERTICAL_OFFSET
+        self.question_rect = pygame.Rect((screen_width - q_box_width) // 2, question_box_y, q_box_width, q_box_height)
+        self.question_anchor = (self.question_rect.x + self.PADDING, self.question_rect.y + self.PADDING)
+        self.answer_y = question_box_y + q_box_height + self.GAP
+        self.rects = []
+        if answer_count > 4:
+            self.columns = 2
+            col_w = (screen_width - 150) // 2
+            self.column_x = [50, 50 + col_w + 50]
+            for idx in range(answer_count):
+                row, col = divmod(idx, 2)
+                self.rects.append(pygame.Rect(self.column_x[col], self.answer_y + row * self.ROW_PITCH,
+                                              col_w, self.ROW_HEIGHT))
+        else:
+            self.columns = 1
+            self.column_x = [50]
+            for idx in range(answer_count):
+                self.rects.append(pygame.Rect(50, self.answer_y + idx * self.ROW_PITCH,
+                                              screen_width - 100, self.ROW_HEIGHT))
+        text_offset = (self.ROW_HEIGHT - text_height) // 2
+        self.text_anchors = [(rect.x + 10, rect.y + text_offset) for rect in self.rects]
+
+    def answer_at(self, pos):
+        """Index of the answer box under `pos`, or None."""
+        x, y = pos
+        row = (y - self.answer_y) // self.ROW_PITCH
+        if row < 0:
+            return None
+        col = 0 if self.columns == 1 or x < self.column_x[1] else 1
+        idx = row * self.columns + col
+        if idx < len(self.rects) and self.rects[idx].collidepoint(pos):
+            return idx
+        return None
+
 class VideoBackground:
-    def __init__(self, video_path, fallback_image_path):
+    def __init__(self, video_path, fallback_image_path, streaming=False, memory_budget_mb=96):
         # Load the fallback image first
         self.fallback_image = None
-        if os.path.exists(fallback_image_path):
-            self.fallback_image = pygame.image.load(fallback_image_path).convert()
+        if fallback_image_path and ASSETS.exists(fallback_image_path):
+            # Converted to the display format later, in _build_frame, so this can run on a worker thread
+            self.fallback_image = ASSETS.image(fallback_image_path)
         
         # Attempt to load the video
         self.video_frames = []
         self.current_frame_index = 0
         self.frame_delay = 30  # Default ~30 FPS
+        self.frame_step = 1  # Show every Nth frame; raised by the frame governor to lower the video frame rate
         self.last_frame_time = 0
         self.playing_forward = True  # Track direction of playback
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.scaled_cache = {}  # frame index -> screen-sized surface
+        self.scaled_size = None
+
+        # Streaming mode: a decoder thread fills a bounded ring buffer with screen-sized frames
+        self.streaming = False
+        self.session = None  # Recording logs the streamed frames shown; a replay shows the logged ones
+        self.total_frames = 0
+        self.stream_frame = None
+        self.stream_sequence = -1  # Place of the frame on screen in the endless ping-pong order
+        self.stream_start = 0
+        self.stream_size = None
+        self.stream_capacity = 2
+        self.stream_buffer = deque()
+        self.stream_cond = threading.Condition()
+        self.stream_generation = 0
+        self.stream_stop = threading.Event()
+        self.stream_thread = None
         
-        if os.path.exists(video_path):
+        # OpenCV opens videos only by file name, so a bundled video is extracted once
+        video_file = ASSETS.path(video_path) if video_path else None
+        if video_file:
             try:
                 import cv2
-                self.cap = cv2.VideoCapture(video_path)
+                self.cap = cv2.VideoCapture(video_file)
                 if not self.cap.isOpened():
                     print(f"Failed to open video file: {video_path}")
                 else:
                     self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
                     self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
                     self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+                    self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
                     if self.fps > 0:
                         self.frame_delay = int(1000 / self.fps)
-                    
-                    # Pre-load all frames to allow for reverse playback
-                    max_preload_frames = 120  # Approximately 4 seconds at 30fps
-                    for _ in range(max_preload_frames):
-                        ret, frame = self.cap.read()
-                        if not ret:
-                            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+                    if streaming:
+                        self.streaming = True
+                        display = pygame.display.get_surface()
+                        if display is not None:
+                            self.start_stream(display.get_size())
+                    else:
+                        # Pre-load all frames to allow for reverse playback
+                        max_preload_frames = 120  # Approximately 4 seconds at 30fps
+                        for _ in range(max_preload_frames):
                             ret, frame = self.cap.read()
                             if not ret:
-                                break
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        pygame_frame = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
-                        self.video_frames.append(pygame_frame)
+                                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                                ret, frame = self.cap.read()
+                                if not ret:
+                                    break
+                            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                            pygame_frame = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+                            self.video_frames.append(pygame_frame)
             except (ImportError, Exception) as e:
                 print(f"Error loading video: {e}")
         
-        self.is_video_loaded = len(self.video_frames) > 0
+        self.is_video_loaded = self.streaming or len(self.video_frames) > 0
 
-    def update(self, dt):
+    def update(self, now=None):
+        """Advance the clip to `now`, the game time in ms (pygame's clock when not given)."""
+        current_time = pygame.time.get_ticks() if now is None else now
+        if self.streaming:
+            self.update_stream(current_time)
+            return
         if not self.is_video_loaded or not self.video_frames:
             return
         
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_frame_time >= self.frame_delay:
+        if current_time - self.last_frame_time >= self.frame_delay * self.frame_step:
             self.last_frame_time = current_time
             
             # Update frame index based on direction (forward or reverse)
             if self.playing_forward:
-                self.current_frame_index += 1
+                self.current_frame_index = min(self.current_frame_index + self.frame_step, len(self.video_frames) - 1)
                 # If we reach the end, reverse direction
                 if self.current_frame_index >= len(self.video_frames) - 1:
                     self.playing_forward = False
             else:
-                self.current_frame_index -= 1
+                self.current_frame_index = max(self.current_frame_index - self.frame_step, 0)
                 # If we reach the beginning, reverse direction
                 if self.current_frame_index <= 0:
                     self.playing_forward = True
 
+    def rewind(self):
+        """Restart the clip and its clock for a new game, whose game time starts again at 0."""
+        self.last_frame_time = 0
+        if not self.streaming:
+            self.current_frame_index = 0
+            self.playing_forward = True
+
+    def attach(self, session):
+        """Play along with a new game's input session; a recording starts with the frame on screen."""
+        self.session = session
+        if self.streaming and session.mode == "record" and self.stream_sequence >= 0:
+            session.record_video(self.stream_sequence)
+        elif self.streaming and session.replaying:
+            self.update_stream(self.last_frame_time)
+
+    def update_stream(self, current_time):
+        """Take the next decoded frame from the ring buffer without ever waiting for the decoder."""
+        if self.session is not None and self.session.replaying:
+            sequence = self.session.take_video()
+            if sequence is not None:
+                self.show_recorded(sequence, current_time)
+            return
+        if current_time - self.last_frame_time < self.frame_delay * self.frame_step:
+            return
+        next_frame = None
+        taken = 0
+        with self.stream_cond:
+            # At a reduced frame rate the frames in between are dropped to keep the clip's speed
+            while self.stream_buffer and taken < self.frame_step:
+                generation, sequence, surface = self.stream_buffer.popleft()
+                if generation == self.stream_generation:
+                    next_frame = surface
+                    self.stream_sequence = sequence
+                    taken += 1
+            self.stream_cond.notify_all()
+        if next_frame is None:
+            return
+        if self.session is not None:
+            self.session.record_video(self.stream_sequence)
+        self.show_stream_frame(next_frame, current_time)
+
+    def show_recorded(self, target, current_time):
+        """Replay: wait for the decoder to deliver frame `target`, restarting it if it is already past."""
+        if target <= self.stream_sequence:
+            self.stream_sequence = target - 1
+            self.start_stream(self.stream_size)
+        next_frame = None
+        with self.stream_cond:
+            while next_frame is None:
+                if not self.stream_buffer:
+                    if self.stream_thread is None or not self.stream_thread.is_alive():
+                        return
+                    self.stream_cond.wait(0.1)
+                    continue
+                generation, sequence, surface = self.stream_buffer.popleft()
+                if generation != self.stream_generation or sequence < target:
+                    continue
+                if sequence > target:
+                    self.stream_sequence = target - 1
+                    self.start_stream(self.stream_size)
+                    continue
+                next_frame = surface
+            self.stream_sequence = target
+            self.stream_cond.notify_all()
+        self.show_stream_frame(next_frame, current_time)
+
+    def show_stream_frame(self, next_frame, current_time):
+        self.last_frame_time = current_time
+        self.stream_frame = converted(next_frame)
+
+    def start_stream(self, screen_size):
+        """(Re)start decoding at the given screen size from the frame after the one on screen."""
+        frame_bytes = max(1, screen_size[0] * screen_size[1] * 3)
+        with self.stream_cond:
+            self.stream_size = screen_size
+            # Half of the budget is the ring buffer, the other half the decoder's reverse-playback chunk
+            self.stream_capacity = max(2, self.memory_budget // (frame_bytes * 2))
+            self.stream_start = self.stream_sequence + 1
+            self.stream_generation += 1
+            self.stream_buffer.clear()
+            self.stream_cond.notify_all()
+        if self.stream_thread is None:
+            self.stream_thread = threading.Thread(target=self.decode_loop, name="video-decoder", daemon=True)
+            self.stream_thread.start()
+
+    def decode_loop(self):
+        """Decoder thread: decode the clip for each stream generation from the frame it starts at."""
+        while not self.stream_stop.is_set():
+            with self.stream_cond:
+                generation = self.stream_generation
+                size = self.stream_size
+                chunk = self.stream_capacity
+                sequence = self.stream_start
+            if not self.decode_from(generation, size, chunk, sequence):
+                break
+
+    def decode_from(self, generation, size, chunk, sequence):
+        """Push the clip's frames in ping-pong order, numbered from `sequence`; False when the clip has no frames."""
+        import cv2
+        position = None  # Frame the capture reads next, when known
+        while True:
+            total = self.total_frames
+            period = max(1, 2 * total - 2)
+            offset = sequence % period
+            if offset < total:
+                if position != offset:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, offset)
+                ret, frame = self.cap.read()
+                if not ret:
+                    if offset == 0:
+                        return False
+                    # The container reported more frames than it has
+                    self.total_frames = offset
+                    position = None
+                    continue
+                position = offset + 1
+                frames = [self.convert_stream_frame(frame, size)]
+            else:
+                # Reverse playback: decode a chunk forward, then hand it over back to front
+                end = period - offset
+                start = max(1, end - chunk + 1)
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                frames = []
+                for _ in range(end - start + 1):
+                    ret, frame = self.cap.read()
+                    if not ret:
+                        break
+                    frames.append(self.convert_stream_frame(frame, size))
+                position = start + len(frames)
+                if len(frames) < end - start + 1:
+                    self.total_frames = position
+                    position = None
+                    continue
+                frames.reverse()
+            if not self.push_stream_frames(generation, sequence, frames):
+                return True
+            sequence += len(frames)
+
+    def push_stream_frames(self, generation, sequence, frames):
+        """Append frames numbered from `sequence`; False once the generation is over or the stream stops."""
+        for number, surface in enumerate(frames, sequence):
+            with self.stream_cond:
+                while (len(self.stream_buffer) >= self.stream_capacity
+                       and generation == self.stream_generation
+                       and not self.stream_stop.is_set()):
+                    self.stream_cond.wait(0.1)
+                if generation != self.stream_generation or self.stream_stop.is_set():
+                    return False
+                self.stream_buffer.append((generation, number, surface))
+                self.stream_cond.notify_all()
+        return True
+
+    @staticmethod
+    def convert_stream_frame(frame, size):
+        """Scale a BGR frame so it covers `size`, crop it to the centre and wrap it in a surface."""
+        import cv2
+        frame_h, frame_w = frame.shape[:2]
+        target_w, target_h = size
+        scale = max(target_w / frame_w, target_h / frame_h)
+        new_w = max(target_w, int(round(frame_w * scale)))
+        new_h = max(target_h, int(round(frame_h * scale)))
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        x = (new_w - target_w) // 2
+        y = (new_h - target_h) // 2
+        frame = cv2.cvtColor(frame[y:y + target_h, x:x + target_w], cv2.COLOR_BGR2RGB)
+        return pygame.image.frombuffer(frame.tobytes(), size, "RGB")
+
+    def close(self):
+        """Stop the decoder thread and release the capture."""
+        self.stream_stop.set()
+        with self.stream_cond:
+            self.stream_cond.notify_all()
+        if self.stream_thread is not None:
+            self.stream_thread.join(timeout=1)
+            self.stream_thread = None
+        cap = getattr(self, "cap", None)
+        if cap is not None:
+            cap.release()
+
     def get_frame(self, screen_width, screen_height):
+        """Return a background surface already scaled, cropped and converted for the screen."""
+        key = (screen_width, screen_height)
+        if self.streaming:
+            if key != self.stream_size:
+                self.start_stream(key)
+            if self.stream_frame is not None:
+                if self.stream_frame.get_size() != key:
+                    # Hold the last frame, rescaled, until the decoder catches up with the new size
+                    self.stream_frame = self._build_frame(self.stream_frame, screen_width, screen_height)
+                return self.stream_frame
+        if key != self.scaled_size:
+            self.invalidate_cache()
+            self.scaled_size = key
         if self.is_video_loaded and self.video_frames:
-            current_frame = self.video_frames[self.current_frame_index]
-            frame_w, frame_h = current_frame.get_size()
-            scale = max(screen_width / frame_w, screen_height / frame_h)
-            new_w = int(frame_w * scale)
-            new_h = int(frame_h * scale)
-            return pygame.transform.scale(current_frame, (new_w, new_h))
+            index = self.current_frame_index
+            source = self.video_frames
         elif self.fallback_image:
-            img_w = self.fallback_image.get_width()
-            img_h = self.fallback_image.get_height()
-            scale = max(screen_width / img_w, screen_height / img_h)
-            new_w = int(img_w * scale)
-            new_h = int(img_h * scale)
-            return pygame.transform.scale(self.fallback_image, (new_w, new_h))
+            index = 0
+            source = [self.fallback_image]
         else:
-            surface = pygame.Surface((screen_width, screen_height))
+            index = 0
+            source = None
+        frame = self.scaled_cache.get(index)
+        if frame is None:
+            frame = self._build_frame(source[index] if source else None, screen_width, screen_height)
+            if len(source or ()) * screen_width * screen_height * frame.get_bytesize() > self.memory_budget:
+                # The clip ping-pongs through every frame, so a partial cache would only ever miss
+                self.scaled_cache.clear()
+            self.scaled_cache[index] = frame
+        return frame
+
+    def invalidate_cache(self):
+        """Drop all pre-scaled frames (call after the display mode changes)."""
+        self.scaled_cache.clear()
+
+    @staticmethod
+    def _build_frame(image, screen_width, screen_height):
+        surface = new_surface((screen_width, screen_height))
+        if image is None:
             surface.fill(DARK_RED)
             pygame.draw.circle(surface, YELLOW, (screen_width // 2, screen_height // 2), 100)
-            return surface
+        else:
+            img_w, img_h = image.get_size()
+            scale = max(screen_width / img_w, screen_height / img_h)
+            new_w = int(img_w * scale)
+            new_h = int(img_h * scale)
+            scaled = scaled_surface(image, (new_w, new_h))
+            surface.blit(scaled, scaled.get_rect(center=(screen_width // 2, screen_height // 2)))
+        return converted(surface)
 
 # ----------------- Main Game Class -----------------
 class FamilyFeudGame:
-    def __init__(self):
+    def __init__(self, session=None, resume=False, data_dir=""):
+        """`data_dir` is where the game journal and the question bank are kept (the game folder by default)."""
+        pygame.mixer.pre_init(buffer=AUDIO_BUFFER)
         pygame.init()
         pygame.mixer.init()
+        # Input comes from the session so a game can be recorded and replayed frame for frame
+        self.session = session or InputSession()
         self.settings = self.load_settings()
+        if self.session.replaying:
+            self.settings.update(self.session.header["settings"])
         self.screen_width = self.settings["screen_width"]
         self.screen_height = self.settings["screen_height"]
         flags = pygame.FULLSCREEN if self.settings["fullscreen"] else 0
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), flags)
         pygame.display.set_caption("Породични Дуел! РГДЕВ - ЕТФ")
         
-        favicon_path = resource_path("assets/favicon.png")
-        if os.path.exists(favicon_path):
-            icon = pygame.image.load(favicon_path)
-            pygame.display.set_icon(icon)
+        if ASSETS.exists("assets/favicon.png"):
+            pygame.display.set_icon(ASSETS.image("assets/favicon.png"))
         
         self.clock = pygame.time.Clock()
+        quality = self.settings.get("quality", "auto")
+        if self.session.replaying:
+            # Quality follows the recorded level changes instead of this machine's frame times
+            quality = self.session.header["quality"]
+        self.governor = FrameGovernor(pinned=None if quality == "auto" else quality)
+        self.now = 0  # Game time in ms, advanced by the frame clock
+        self.debug_overlay = self.settings.get("debug_overlay", False)
+        if self.settings.get("profiler", False):
+            PROFILER.enable(self.settings.get("profile_output") or None)
+        self.profiler_lines = []
         # Load assets (fonts, video, sounds, music) with a loading bar
         self.load_assets()
         
-        self.conn = self.init_db()
+        # A replay must not add a second copy of the recorded game to the journal
+        self.journal = GameJournal(os.path.join(data_dir, GAME_DB), enabled=not self.session.replaying)
+        self.buzzer = None
+        if self.settings.get("buzzer", False) and not self.session.replaying:
+            try:
+                self.buzzer = BuzzerServer(port=self.settings.get("buzzer_port", 7777),
+                                           window_ms=self.settings.get("buzzer_window_ms", 40))
+                print(f"Сервер за зујалице слуша на UDP порту {self.buzzer.port}.")
+            except OSError as e:
+                print(f"Сервер за зујалице није покренут: {e}")
+        self.spectator = None
+        if self.settings.get("spectator", False):
+            try:
+                self.spectator = SpectatorStream(port=self.settings.get("spectator_port", 8080),
+                                                 fps=self.settings.get("spectator_fps", 15),
+                                                 quality=self.settings.get("spectator_quality", 75),
+                                                 max_width=self.settings.get("spectator_max_width", 1280))
+                print(f"Пренос за гледаоце: http://localhost:{self.spectator.port}/")
+            except (ImportError, OSError) as e:
+                print(f"Пренос за гледаоце није покренут: {e}")
+        self.bank = QuestionBank(os.path.join(data_dir, QUESTION_DB))
+        if os.path.isdir(QUESTIONS_DIR) or questions_bundled():
+            changed = self.bank.compile(QUESTIONS_DIR)
+            if changed:
+                issues = self.bank.lint_issues()
+                errors = sum(1 for issue in issues if issue[1] == "error")
+                print(f"Пакет питања је освежен ({changed} измењених фајлова): {errors} грешака, "
+                      f"{len(issues) - errors} упозорења. Детаљи: python main.py --compile-questions")
+        self.games_started = 0
+        self.new_game(self.session, resume)
+
+    def new_game(self, session, resume=False):
+        """Reset the per-game state for a game played with `session`."""
+        self.session = session
+        self.resume = resume
+        if not resume and self.journal.unfinished_game() is not None:
+            print("Претходна игра није завршена; наставља се са: python main.py --resume")
         self.team1_name, self.team2_name = self.load_team_names()
-        
+        if self.session.replaying:
+            self.team1_name, self.team2_name = self.session.header["teams"]
+        self.audio.start_music()
+        self.games_started += 1
+        # Game time restarts so a recording of this game replays the same as one from a fresh start
+        self.now = 0
+        self.video_bg.rewind()
+        self.clock.tick()
         self.total_team1 = 0
         self.total_team2 = 0
         self.round_results = []
-        self.last_glaze_time = pygame.time.get_ticks()
+        self.last_glaze_time = self.now
         self.glaze_effect_duration = 700  # milliseconds
         self.active_glaze_index = None
         self.glaze_start_time = None
         self.last_glazed_index = None
+        # Retained board state for dirty-rectangle redraws
+        self.board_signature = None
+        self.board_background = None
+        self.board_layer = None
+        self.board_rects = []
+        self.board_layout = None
+        # Effects run as timelines on the shared frame clock instead of blocking loops
+        self.animator = Animator()
+        self.frame_dt = 0
+        self.board_glaze_rect = None
+        self.prefetcher = None
+        self.session.start(self.settings, (self.team1_name, self.team2_name), self.governor.quality["name"])
+        self.video_bg.attach(self.session)
 
     def draw_loading_bar(self, progress):
-        # Try to load the background image
-        loader_path = resource_path("assets/loader.png")
-        if os.path.exists(loader_path):
-            try:
-                loader_bg = pygame.image.load(loader_path)
-                self.screen.blit(loader_bg, (-25, 100))
-            except Exception as e:
-                # If loading fails, fall back to black background
-                print(f"Could not load loader.png: {e}")
-                self.screen.fill(BLACK)
-        else:
-            # If the image doesn't exist, use black background
-            self.screen.fill(BLACK)
+        # Load the background image and label font once, not on every redraw
+        if not hasattr(self, "loader_image"):
+            self.loader_image = None
+            if ASSETS.exists("assets/loader.png"):
+                try:
+                    self.loader_image = converted(ASSETS.image("assets/loader.png"), alpha=True)
+                except Exception as e:
+                    # If loading fails, fall back to black background
+                    print(f"Could not load loader.png: {e}")
+            self.loader_font = load_font(["assets/fonts/Roboto-Regular.ttf"], 24, "Roboto")
+        self.screen.fill(BLACK)
+        if self.loader_image:
+            self.screen.blit(self.loader_image, (-25, 100))
         # Define dimensions for the loading bar
         bar_width = self.screen_width // 2
         bar_height = 30
@@ -247,13 +2697,12 @@ class FamilyFeudGame:
             
             # Add a glossy highlight on the top half to simulate shine
             highlight_rect = pygame.Rect(bar_x, bar_y, fill_width, bar_height // 2)
-            highlight_surface = pygame.Surface((fill_width, bar_height // 2), pygame.SRCALPHA)
+            highlight_surface = new_surface((fill_width, bar_height // 2), pygame.SRCALPHA)
             highlight_surface.fill((255, 255, 255, 50))  # Semi-transparent white overlay
             self.screen.blit(highlight_surface, (bar_x, bar_y))
         
         # Render the loading text above the bar
-        font = pygame.font.SysFont("Roboto", 24)
-        loading_text = font.render("Учитавам...", True, WHITE)
+        loading_text = render_text(self.loader_font, "Учитавам...", WHITE)
         text_rect = loading_text.get_rect(center=(self.screen_width // 2, bar_y - 20))
         self.screen.blit(loading_text, text_rect)
         
@@ -262,71 +2711,55 @@ class FamilyFeudGame:
 
 
     def load_assets(self):
-        total_steps = 4
-        current_step = 0
+        # Fonts, video and sounds are decoded on worker threads while the main thread keeps the
+        # window responsive and draws the loading bar from the actual progress.
+        self.draw_loading_bar(0)
+        video_path = "assets/background.mp4"
+        fallback_image_path = "assets/background.jpg"
+        loader = AssetLoader()
+        for font_paths, size, bold in PRELOADED_FONTS:
+            loader.submit(f"font_{size}{'_bold' if bold else ''}", FONT_REGISTRY.preload,
+                          font_paths, size, "Roboto", bold, weight=asset_size(font_paths))
+        loader.submit("video_bg", self.load_video_background, video_path, fallback_image_path,
+                      weight=asset_size(["assets/background.mp4"]) + asset_size(["assets/background.jpg"]))
+        sound_paths = {name: audio_asset(name) for name in ("correct", "wrong", "victory")}
+        for name, path in sound_paths.items():
+            if path:
+                loader.submit(f"{name}_sound", ASSETS.sound, path, weight=ASSETS.size(path))
+        loader.submit("strike_sprites", self.build_strike_sprites, weight=asset_size(BOLD_FONT_PATHS))
+        while not loader.done():
+            for event in pygame.event.get():
+                if event.type == QUIT:
+                    self.quit()
+            self.draw_loading_bar(loader.progress())
+            self.clock.tick(60)
+        loader.shutdown()
 
-        # Step 1: Load fonts
-        self.font_regular = load_font(FONT_PATHS, REGULAR_SIZE, "Roboto")
-        self.font_question = load_font(BOLD_FONT_PATHS, QUESTION_SIZE, "Roboto")
-        self.font_footer = load_font(FONT_PATHS, FOOTER_SIZE, "Roboto")
-        current_step += 1
-        self.draw_loading_bar(current_step / total_steps)
-        pygame.time.wait(200)
-
-        # Step 2: Load video background
-        video_path = resource_path("assets/background.mp4")
-        fallback_image_path = resource_path("assets/background.jpg")
-        self.video_bg = VideoBackground(video_path, fallback_image_path)
-        current_step += 1
-        self.draw_loading_bar(current_step / total_steps)
-        pygame.time.wait(200)
-
-        # Step 3: Load sounds
-        self.correct_sound = self.load_sound("assets/correct.wav")
-        self.wrong_sound = self.load_sound("assets/wrong.wav")
-        if self.correct_sound:
-            self.correct_sound.set_volume(self.settings.get("volume", 100) / 100)
-        if self.wrong_sound:
-            self.wrong_sound.set_volume(0.4 * self.settings.get("volume", 100) / 100)
-        current_step += 1
-        self.draw_loading_bar(current_step / total_steps)
-        pygame.time.wait(200)
-
-        # Step 4: Load music
-        music_path = resource_path("assets/music.wav")
-        if os.path.exists(music_path):
-            pygame.mixer.music.load(music_path)
-            pygame.mixer.music.set_volume(self.settings.get("music_volume", 100) / 100)
-        current_step += 1
-        self.draw_loading_bar(current_step / total_steps)
-        pygame.time.wait(200)
-
-        # Start playing music after loading is complete
-        pygame.mixer.music.play(-1)
-
-    def load_sound(self, filename):
-        path = resource_path(filename)
-        return pygame.mixer.Sound(path) if os.path.exists(path) else None
-
-    def init_db(self):
-        db_filename = "family_feud.db"
-        if os.path.exists(db_filename):
-            os.remove(db_filename)
-        conn = sqlite3.connect(db_filename)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS rounds (
-                round_number INTEGER PRIMARY KEY,
-                team1_points INTEGER,
-                team2_points INTEGER
-            )
-        """)
-        conn.commit()
-        return conn
-
-    def save_round_result(self, round_number, team1_points, team2_points):
-        self.conn.execute("INSERT INTO rounds (round_number, team1_points, team2_points) VALUES (?, ?, ?)",
-                          (round_number, team1_points, team2_points))
-        self.conn.commit()
+        self.apply_font_settings()
+        self.strike_sprites = loader.result("strike_sprites")
+        self.video_bg = loader.result("video_bg")
+        if self.video_bg is None:
+            self.video_bg = VideoBackground("", fallback_image_path)
+
+        # Music is streamed by the mixer, so loading it only opens the file
+        start = time.perf_counter()
+        self.audio = AudioEngine({name: loader.result(f"{name}_sound") for name, path in sound_paths.items() if path},
+                                 audio_asset("music"))
+        self.audio.set_volumes(self.settings.get("volume", 100) / 100, self.settings.get("music_volume", 100) / 100)
+        if self.settings.get("audio_debug", False):
+            self.audio.debug_hook = self.audio.record_latency
+        loader.timings["music"] = time.perf_counter() - start
+        self.draw_loading_bar(1.0)
+        self.asset_timings = loader.timings
+        loader.report()
+
+        self.apply_quality()
+
+    def load_video_background(self, video_path, fallback_image_path):
+        # cv2 is only imported (inside VideoBackground) when a video file actually exists
+        return VideoBackground(video_path, fallback_image_path,
+                               streaming=self.settings.get("video_streaming", True),
+                               memory_budget_mb=self.settings.get("video_memory_mb", 96))
 
     def load_team_names(self):
         teams_file = "teams.txt"
@@ -338,196 +2771,368 @@ class FamilyFeudGame:
         return "Тим1", "Тим2"
 
     def draw_footer(self):
-        footer_text = self.font_footer.render("РГ за истраживачко-развојне делатности, ЕТФ, 2025 ©", True, GOLD)
+        footer_text = render_text(self.font_footer, "РГ за истраживачко-развојне делатности, ЕТФ, 2025 ©", GOLD)
         self.screen.blit(footer_text, (self.screen_width - footer_text.get_width() - 10,
                                       self.screen_height - footer_text.get_height() - 10))
 
     def draw_background(self):
+        # Anything else drawn over the screen means the retained board must be redrawn in full
+        self.invalidate_board()
+        PROFILER.begin("background")
         current_width, current_height = self.screen.get_size()
-        self.video_bg.update(0)
+        self.video_bg.update(self.now)
         frame = self.video_bg.get_frame(current_width, current_height)
-        rect = frame.get_rect(center=(current_width // 2, current_height // 2))
-        self.screen.blit(frame, rect)
+        self.screen.blit(frame, (0, 0))
+        PROFILER.end("background")
 
     @staticmethod
     def screen_shake_offset(intensity=10):
         return random.randint(-intensity, intensity), random.randint(-intensity, intensity)
 
     def fade_transition(self, fade_in=True, duration=500):
-        clock = pygame.time.Clock()
-        start_time = pygame.time.get_ticks()
-        current_size = self.screen.get_size()
-        while True:
-            elapsed = pygame.time.get_ticks() - start_time
-            if elapsed > duration:
-                break
+        """Fade the gray overlay in over the background (or out of it); returns the timeline."""
+        return self.animator.play(self.fade_steps(fade_in, duration), tag="fade")
+
+    def fade_steps(self, fade_in=True, duration=500):
+        def draw(screen, progress):
             self.draw_background()
-            overlay = pygame.Surface(current_size)
+            overlay = new_surface(screen.get_size())
             overlay.fill(GRAY)
-            alpha = int((elapsed / duration) * 255) if fade_in else 255 - int((elapsed / duration) * 255)
+            alpha = int(progress * 255) if fade_in else 255 - int(progress * 255)
             overlay.set_alpha(alpha)
-            self.screen.blit(overlay, (0, 0))
-            pygame.display.flip()
-            clock.tick(60)
-
-    def show_confetti(self, duration=3000):
-        # Stop current background music and start victory music.
-        pygame.mixer.music.stop()
-        victory_music_path = resource_path("assets/victory.wav")
-        if os.path.exists(victory_music_path):
-            pygame.mixer.music.load(victory_music_path)
-            pygame.mixer.music.play(-1)  # Loop indefinitely until game restart
+            screen.blit(overlay, (0, 0))
+        return [Tween(duration, draw=draw, covers_screen=True)]
 
-        # Existing victory screen logic:
+    def show_confetti(self, duration=3000, hold=5000):
+        """Victory screen: confetti for `duration` ms, then the final score stays up for `hold` ms."""
         if self.total_team1 == self.total_team2:
             winner = "Нерешено!"
         else:
             winner = f"Победник: {self.team1_name}" if self.total_team1 > self.total_team2 else f"Победник: {self.team2_name}"
-        particles = [ConfettiParticle(random.randint(0, self.screen_width), 0) for _ in range(150)]
-        start_time = pygame.time.get_ticks()
-        final_font = load_font(BOLD_FONT_PATHS, FINAL_SIZE, "Roboto")
-        while pygame.time.get_ticks() - start_time < duration:
+        final_font = load_font(BOLD_FONT_PATHS, FINAL_SIZE, "Roboto", bold=True)
+        final_msg = f"Коначни резултат - {self.team1_name}: {self.total_team1} | {self.team2_name}: {self.total_team2}"
+        confetti = None
+        particles = []
+
+        def start():
+            nonlocal confetti, particles
+            self.audio.play_victory()
+            try:
+                confetti = ConfettiSystem(self.settings.get("confetti_particles", 1500), self.screen_width, self.screen_height,
+                                          seed=random.getrandbits(32))
+            except ImportError:
+                # Without NumPy fall back to the per-object particles
+                particles = [ConfettiParticle(random.randint(0, self.screen_width), 0) for _ in range(150)]
+
+        def draw(screen, progress, animate=True):
             self.draw_background()
+            if confetti is not None:
+                max_particles = self.governor.quality["max_particles"]
+                confetti.limit = confetti.count if max_particles is None else max_particles
+                if animate:
+                    confetti.update(self.frame_dt / (1000 / 60))
+                confetti.draw(screen)
             for p in particles:
-                p.update()
-                p.draw(self.screen)
-            final_msg = f"Коначни резултат - {self.team1_name}: {self.total_team1} | {self.team2_name}: {self.total_team2}"
-            final_surf = final_font.render(final_msg, True, WHITE)
-            winner_surf = final_font.render(winner, True, DARK_RED)
-            self.screen.blit(final_surf, ((self.screen_width - final_surf.get_width()) // 2, self.screen_height // 2 - 50))
-            self.screen.blit(winner_surf, ((self.screen_width - winner_surf.get_width()) // 2, self.screen_height // 2 + 20))
+                if animate:
+                    p.update()
+                p.draw(screen)
+            final_surf = render_text(final_font, final_msg, WHITE)
+            winner_surf = render_text(final_font, winner, DARK_RED)
+            screen.blit(final_surf, ((self.screen_width - final_surf.get_width()) // 2, self.screen_height // 2 - 50))
+            screen.blit(winner_surf, ((self.screen_width - winner_surf.get_width()) // 2, self.screen_height // 2 + 20))
             self.draw_footer()
-            pygame.display.flip()
-            self.clock.tick(60)
+
+        return self.animator.play([
+            Tween(duration, draw=draw, on_start=start, covers_screen=True),
+            Tween(hold, draw=lambda screen, progress: draw(screen, progress, animate=False), covers_screen=True)
+        ], tag="confetti")
 
     def show_round_over_popup(self, round_results):
+        """Round summary popup: zooms in, stays up for 5 s (a keypress skips) and returns the steps."""
         popup_w, popup_h = self.screen_width // 2, self.screen_height // 2
-        popup = pygame.Surface((popup_w, popup_h))
-        popup.fill((30, 30, 30))
-        popup.set_alpha(240)
-        header_font = load_font(BOLD_FONT_PATHS, HEADER_SIZE, "Roboto")
-        header_surf = header_font.render("Рунда Завршена", True, GOLD)
-        popup.blit(header_surf, header_surf.get_rect(center=(popup_w // 2, 30)))
-        scoreboard = f"Скор: {self.total_team1}:{self.total_team2}"
-        popup.blit(self.font_regular.render(scoreboard, True, WHITE),
-                   (popup_w // 2 - self.font_regular.size(scoreboard)[0] // 2, 60))
-        popup.blit(self.font_regular.render("Рунде:", True, WHITE),
-                   (popup_w // 2 - self.font_regular.size("Рунде:")[0] // 2, 100))
-        y_offset = 130
-        for result in round_results:
-            text_surf = self.font_regular.render(result, True, WHITE)
-            popup.blit(text_surf, (popup_w // 2 - text_surf.get_width() // 2, y_offset))
-            y_offset += text_surf.get_height() + 5
-        pygame.draw.rect(popup, GOLD, popup.get_rect(), 3)
-        for scale in range(50, 101, 5):
-            scaled = pygame.transform.smoothscale(popup, (popup_w * scale // 100, popup_h * scale // 100))
-            rect = scaled.get_rect(center=(self.screen_width // 2, self.screen_height // 2))
+        popup = None
+
+        def build():
+            nonlocal popup
+            popup = new_surface((popup_w, popup_h))
+            popup.fill((30, 30, 30))
+            popup.set_alpha(240)
+            header_font = load_font(BOLD_FONT_PATHS, HEADER_SIZE, "Roboto", bold=True)
+            header_surf = render_text(header_font, "Рунда Завршена", GOLD)
+            popup.blit(header_surf, header_surf.get_rect(center=(popup_w // 2, 30)))
+            scoreboard_surf = render_text(self.font_regular, f"Скор: {self.total_team1}:{self.total_team2}", WHITE)
+            popup.blit(scoreboard_surf, (popup_w // 2 - scoreboard_surf.get_width() // 2, 60))
+            rounds_surf = render_text(self.font_regular, "Рунде:", WHITE)
+            popup.blit(rounds_surf, (popup_w // 2 - rounds_surf.get_width() // 2, 100))
+            y_offset = 130
+            for result in round_results:
+                text_surf = render_text(self.font_regular, result, WHITE)
+                popup.blit(text_surf, (popup_w // 2 - text_surf.get_width() // 2, y_offset))
+                y_offset += text_surf.get_height() + 5
+            pygame.draw.rect(popup, GOLD, popup.get_rect(), 3)
+
+        def draw_zoom(screen, progress):
+            scale = 50 + int(progress * 50)
+            scaled = self.scale_surface(popup, (popup_w * scale // 100, popup_h * scale // 100))
             self.draw_background()
-            self.screen.blit(scaled, rect)
-            pygame.display.flip()
-            pygame.time.delay(30)
-        self.screen.blit(popup, popup.get_rect(center=(self.screen_width // 2, self.screen_height // 2)))
-        pygame.display.flip()
-        start_time = pygame.time.get_ticks()
-        while pygame.time.get_ticks() - start_time < 5000:
-            for event in pygame.event.get():
-                if event.type in (QUIT, KEYDOWN) and (event.type != KEYDOWN or event.key == K_ESCAPE):
-                    pygame.quit(); sys.exit()
-                elif event.type in (KEYDOWN, MOUSEBUTTONDOWN):
-                    return
-            pygame.time.delay(100)
-
-    def show_wrong_feedback(self):
-        if self.wrong_sound:
-            self.wrong_sound.play()
-        bg_copy = self.screen.copy()
-        start_time = pygame.time.get_ticks()
-        duration = 1250
-        intensity = 10
-        big_font = load_font(BOLD_FONT_PATHS, BIG_SIZE, "Roboto")
-        orig_x = big_font.render("X", True, RED).convert_alpha()
-        orig_x.set_colorkey((0, 0, 0))
-        while pygame.time.get_ticks() - start_time < duration:
-            elapsed = pygame.time.get_ticks() - start_time
-            alpha = max(255 - int(255 * (elapsed / duration)), 0)
-            scale = 1.0 + 0.5 * (elapsed / duration)
+            screen.blit(scaled, scaled.get_rect(center=(self.screen_width // 2, self.screen_height // 2)))
+
+        def draw_popup(screen, progress):
+            self.draw_background()
+            screen.blit(popup, popup.get_rect(center=(self.screen_width // 2, self.screen_height // 2)))
+
+        return [
+            Tween(330, draw=draw_zoom, on_start=build, covers_screen=True),
+            Tween(5000, draw=draw_popup, covers_screen=True)
+        ]
+
+    def get_strike_sprites(self):
+        """Scaled, faded frames of the strike "X", built once and reused."""
+        if not self.strike_sprites:
+            self.strike_sprites = self.build_strike_sprites()
+        return self.strike_sprites
+
+    @staticmethod
+    def build_strike_sprites():
+        """Build the strike frames as (sprite, half_width, half_height); safe on an asset loader thread."""
+        big_font = load_font(BOLD_FONT_PATHS, BIG_SIZE, "Roboto", bold=True)
+        orig_x = render_text(big_font, "X", RED)
+        sprites = []
+        for frame in range(STRIKE_FRAMES):
+            progress = frame / STRIKE_FRAMES
+            alpha = max(255 - int(255 * progress), 0)
+            scale = 1.0 + 0.5 * progress
             new_size = (int(orig_x.get_width() * scale), int(orig_x.get_height() * scale))
-            scaled_x = pygame.transform.smoothscale(orig_x, new_size)
-            scaled_x.set_alpha(alpha)
+            sprite = scaled_surface(orig_x, new_size, smooth=True)
+            sprite.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+            sprites.append((sprite, new_size[0] // 2, new_size[1] // 2))
+        return sprites
+
+    def show_wrong_feedback(self, since=None):
+        """Start the strike "X" over the live screen; `since` is when the strike was input."""
+        sprites = self.get_strike_sprites()
+        center_x, center_y = self.screen_width // 2, self.screen_height // 2
+        intensity = 10
+
+        def start():
+            self.audio.play("wrong", since=since)
+
+        def draw(screen, progress):
+            sprite, half_w, half_h = sprites[min(int(progress * STRIKE_FRAMES), STRIKE_FRAMES - 1)]
             offset = self.screen_shake_offset(intensity)
-            self.screen.blit(bg_copy, (0, 0))
-            rect = scaled_x.get_rect(center=(self.screen_width // 2 + offset[0], self.screen_height // 2 + offset[1]))
-            self.screen.blit(scaled_x, rect)
+            screen.blit(sprite, (center_x + offset[0] - half_w, center_y + offset[1] - half_h))
+
+        return self.animator.play([Tween(STRIKE_DURATION, draw=draw, on_start=start)], tag="strike", blocking=False)
+
+    def tick(self):
+        """End the frame on the shared clock and let the governor adjust quality from its cost."""
+        if self.spectator is not None:
+            PROFILER.begin("capture")
+            self.spectator.capture(self.screen)
+            PROFILER.end("capture")
+        self.frame_dt = self.session.tick(self.clock, TARGET_FPS)
+        self.now += self.frame_dt
+        if self.session.replaying:
+            level = self.session.take_quality()
+            if level is not None:
+                self.governor.set_level([q["name"] for q in QUALITY_LEVELS].index(level))
+                self.apply_quality()
+        elif self.governor.record(self.clock.get_rawtime()):
+            self.session.record_quality(self.governor.quality["name"])
+            self.apply_quality()
+        PROFILER.end_frame(self.clock.get_rawtime())
+
+    def toggle_debug(self, key):
+        """F3 toggles the quality overlay, F4 the frame profiler."""
+        if key == pygame.K_F3:
+            self.debug_overlay = not self.debug_overlay
+        elif PROFILER.enabled:
+            PROFILER.disable()
+        else:
+            PROFILER.enable(self.settings.get("profile_output") or None)
+
+    def draw_profiler_overlay(self):
+        # Percentiles are recomputed twice a second rather than every frame
+        if not self.profiler_lines or PROFILER.frames % 30 == 0:
+            self.profiler_lines = PROFILER.report_lines()
+        y = self.screen_height - 30 - len(self.profiler_lines) * self.font_footer.get_linesize()
+        for line in self.profiler_lines:
+            surf = render_text(self.font_footer, line, WHITE)
+            self.screen.fill(BLACK, surf.get_rect(topleft=(10, y)).inflate(8, 2))
+            self.screen.blit(surf, (10, y))
+            y += self.font_footer.get_linesize()
+
+    def apply_quality(self):
+        quality = self.governor.quality
+        self.video_bg.frame_step = quality["video_frame_step"]
+        if not quality["glaze"]:
+            self.active_glaze_index = None
+
+    def scale_surface(self, surface, size):
+        """smoothscale, or the cheaper scale when the governor has lowered quality."""
+        return scaled_surface(surface, size, smooth=self.governor.quality["smooth_scaling"])
+
+    def draw_debug_overlay(self):
+        quality = self.governor.quality["name"]
+        mode = "закључан" if self.governor.pinned else "ауто"
+        text = f"Квалитет: {quality} ({mode}) | {self.governor.average_ms:.0f} ms | {self.clock.get_fps():.0f} FPS"
+        surf = render_text(self.font_footer, text, YELLOW)
+        self.screen.fill(BLACK, surf.get_rect(topleft=(10, 10)).inflate(8, 4))
+        self.screen.blit(surf, (10, 10))
+        if self.prefetcher is not None:
+            labels = {"ready": "спремна", "loading": "учитава се", "queued": "на чекању"}
+            rounds = ", ".join(f"{round_num}: {labels[state]}" for round_num, state in self.prefetcher.status())
+            text = f"Припрема (дубина {self.prefetcher.depth}): {rounds or '-'}"
+            surf = render_text(self.font_footer, text, YELLOW)
+            y = 14 + self.font_footer.get_linesize()
+            self.screen.fill(BLACK, surf.get_rect(topleft=(10, y)).inflate(8, 4))
+            self.screen.blit(surf, (10, y))
+
+    def present(self, draw_scene):
+        """Draw the scene (unless an animation covers it), the running animations, and flip."""
+        if not self.animator.covers_screen():
+            draw_scene()
+        PROFILER.begin("animations")
+        self.animator.draw(self.screen)
+        PROFILER.end("animations")
+        if self.debug_overlay:
+            self.draw_debug_overlay()
+        if PROFILER.enabled:
+            self.draw_profiler_overlay()
+        PROFILER.begin("flip")
+        pygame.display.flip()
+        PROFILER.end("flip")
+        # Animations drew over the screen, so the retained board is stale
+        self.invalidate_board()
+
+    def play_animations(self):
+        """Run the animations to completion on the shared frame clock; a keypress skips the current step."""
+        while self.animator.active:
+            PROFILER.begin("events")
+            for event in self.session.events():
+                if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                    self.quit()
+                elif event.type == KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                    self.toggle_debug(event.key)
+                elif event.type in (KEYDOWN, MOUSEBUTTONDOWN):
+                    self.animator.skip()
+            PROFILER.end("events")
+            self.animator.update(self.frame_dt)
+            self.present(self.draw_background)
+            self.tick()
+
+    def draw_board(self, question, answers, strikes, state, active_team, present=True):
+        """Draw the answer board, pushing only the animated regions when nothing else changed; returns the answer rects."""
+        PROFILER.begin("board")
+        current_size = self.screen.get_size()
+        PROFILER.begin("background")
+        self.video_bg.update(self.now)
+        background = self.video_bg.get_frame(*current_size)
+        PROFILER.end("background")
+        signature = (current_size, question, tuple(a["revealed"] for a in answers), strikes, state, active_team,
+                     self.total_team1, self.total_team2, self.team1_name, self.team2_name)
+        full_redraw = (not self.settings.get("retained_board", True)
+                       or signature != self.board_signature
+                       or background is not self.board_background)
+        if signature != self.board_signature:
+            self.board_layer, self.board_rects = self.compose_board_layer(question, answers, strikes, state, active_team)
+        rects = self.board_rects
+
+        PROFILER.begin("glaze")
+        glaze_rect = self.update_glaze(rects)
+        PROFILER.end("glaze")
+        if full_redraw:
+            self.screen.fill(BLACK)
+            self.screen.blit(background, (0, 0))
+            self.screen.blit(self.board_layer, (0, 0))
+            dirty_rects = None
+        else:
+            dirty_rects = [rects[i].inflate(12, 12) for i, ans in enumerate(answers) if ans["revealed"]]
+            for rect in (self.board_glaze_rect, glaze_rect):
+                if rect is not None:
+                    dirty_rects.append(rect)
+            for rect in dirty_rects:
+                self.screen.blit(background, rect, rect)
+                self.screen.blit(self.board_layer, rect, rect)
+
+        current_time = self.now / 500
+        pulse = int(5 * abs(math.sin(current_time)))
+        for i, ans in enumerate(answers):
+            if ans["revealed"]:
+                pygame.draw.rect(self.screen, YELLOW, rects[i].inflate(pulse, pulse), 4, border_radius=8)
+        if glaze_rect is not None:
+            PROFILER.begin("glaze")
+            glaze_surface = new_surface(glaze_rect.size, pygame.SRCALPHA)
+            glaze_surface.fill((255, 255, 255, 150))
+            self.screen.blit(glaze_surface, glaze_rect)
+            PROFILER.end("glaze")
+
+        PROFILER.begin("flip")
+        if present and full_redraw:
             pygame.display.flip()
-            self.clock.tick(60)
+        elif present and dirty_rects:
+            pygame.display.update(dirty_rects)
+        PROFILER.end("flip")
+        self.board_signature = signature
+        self.board_background = background
+        self.board_glaze_rect = glaze_rect
+        PROFILER.end("board")
+        return rects
 
-    def draw_board(self, question, answers, strikes, state, active_team):
-        self.screen.fill(BLACK)
-        self.draw_background()
+    def invalidate_board(self):
+        """Force the next draw_board to redraw and flip the whole screen; the cached layer is kept."""
+        self.board_background = None
+
+    def compose_board_layer(self, question, answers, strikes, state, active_team):
+        """Compose everything on the board that does not animate into a transparent layer."""
+        layer = new_surface(self.screen.get_size(), pygame.SRCALPHA)
         score_text = f"Резултат - {self.team1_name}: {self.total_team1} | {self.team2_name}: {self.total_team2}"
-        self.screen.blit(self.font_regular.render(score_text, True, WHITE),
-                         (self.screen_width - self.font_regular.size(score_text)[0] - 20, 20))
+        score_surf = render_text(self.font_regular, score_text, WHITE)
+        layer.blit(score_surf, (self.screen_width - score_surf.get_width() - 20, 20))
         active_text = f"Активни тим: {self.team1_name if active_team == 1 else self.team2_name}"
         color = RED if active_team == 1 else BLUE
-        self.screen.blit(self.font_regular.render(active_text, True, color),
-                         (self.screen_width - self.font_regular.size(active_text)[0] - 20, 60))
-        question_font = self.font_question
-        q_surf = question_font.render(question, True, BLACK)
-        padding = 20
-        q_box_width = q_surf.get_width() + padding * 2
-        q_box_height = q_surf.get_height() + padding * 2
-        gap = 20
-        total_content_height = q_box_height + gap + len(answers) * 60
-        question_box_y = (self.screen_height - total_content_height) // 2 + BOARD_VERTICAL_OFFSET
-        q_rect = pygame.Rect((self.screen_width - q_box_width) // 2, question_box_y, q_box_width, q_box_height)
+        active_surf = render_text(self.font_regular, active_text, color)
+        layer.blit(active_surf, (self.screen_width - active_surf.get_width() - 20, 60))
+        q_surf = render_text(self.font_question, question, BLACK)
+        layout = self.get_board_layout(q_surf.get_size(), len(answers))
+        q_rect = layout.question_rect
         shadow_rect = q_rect.move(3, 3)
-        pygame.draw.rect(self.screen, (30, 30, 30), shadow_rect, border_radius=8)
-        pygame.draw.rect(self.screen, WHITE, q_rect, border_radius=8)
-        pygame.draw.rect(self.screen, WHITE, q_rect, 2, border_radius=8)
-        self.screen.blit(q_surf, (q_rect.x + padding, q_rect.y + padding))
-        answer_y = question_box_y + q_box_height + gap
-        rects = []
-        current_time = pygame.time.get_ticks() / 500
-        if len(answers) > 4:
-            rows = math.ceil(len(answers) / 2)
-            col_w = (self.screen_width - 150) // 2
-            left_x, right_x = 50, 50 + col_w + 50
-            for row in range(rows):
-                y = answer_y + row * 60
-                for col, idx in enumerate([row * 2, row * 2 + 1]):
-                    if idx < len(answers):
-                        x = left_x if col == 0 else right_x
-                        rect = pygame.Rect(x, y, col_w, 50)
-                        shadow_rect = rect.move(3, 3)
-                        pygame.draw.rect(self.screen, (30, 30, 30), shadow_rect, border_radius=8)
-                        pygame.draw.rect(self.screen, GRAY, rect, border_radius=8)
-                        pygame.draw.rect(self.screen, WHITE, rect, 2, border_radius=8)
-                        if answers[idx]["revealed"]:
-                            pulse = int(5 * abs(math.sin(current_time)))
-                            pygame.draw.rect(self.screen, YELLOW, rect.inflate(pulse, pulse), 4, border_radius=8)
-                            text = f"{idx+1}. {answers[idx]['answer']} - {answers[idx]['points']}"
-                        else:
-                            text = f"{idx+1}."
-                        text_surf = self.font_regular.render(text, True, BLACK)
-                        self.screen.blit(text_surf, (rect.x + 10, rect.y + (50 - self.font_regular.get_height()) // 2))
-                        rects.append(rect)
-        else:
-            for i, ans in enumerate(answers):
-                rect = pygame.Rect(50, answer_y + i * 60, self.screen_width - 100, 50)
-                shadow_rect = rect.move(3, 3)
-                pygame.draw.rect(self.screen, (30, 30, 30), shadow_rect, border_radius=8)
-                pygame.draw.rect(self.screen, GRAY, rect, border_radius=8)
-                pygame.draw.rect(self.screen, WHITE, rect, 2, border_radius=8)
-                if ans["revealed"]:
-                    pulse = int(5 * abs(math.sin(current_time)))
-                    pygame.draw.rect(self.screen, YELLOW, rect.inflate(pulse, pulse), 4, border_radius=8)
-                    text = f"{i+1}. {ans['answer']} - {ans['points']}"
-                else:
-                    text = f"{i+1}."
-                text_surf = self.font_regular.render(text, True, BLACK)
-                self.screen.blit(text_surf, (rect.x + 10, rect.y + (50 - self.font_regular.get_height()) // 2))
-                rects.append(rect)
-        now = pygame.time.get_ticks()
+        pygame.draw.rect(layer, (30, 30, 30), shadow_rect, border_radius=8)
+        pygame.draw.rect(layer, WHITE, q_rect, border_radius=8)
+        pygame.draw.rect(layer, WHITE, q_rect, 2, border_radius=8)
+        layer.blit(q_surf, layout.question_anchor)
+        for i, (ans, rect) in enumerate(zip(answers, layout.rects)):
+            shadow_rect = rect.move(3, 3)
+            pygame.draw.rect(layer, (30, 30, 30), shadow_rect, border_radius=8)
+            pygame.draw.rect(layer, GRAY, rect, border_radius=8)
+            pygame.draw.rect(layer, WHITE, rect, 2, border_radius=8)
+            if ans["revealed"]:
+                text = f"{i+1}. {ans['answer']} - {ans['points']}"
+            else:
+                text = f"{i+1}."
+            layer.blit(render_text(self.font_regular, text, BLACK), layout.text_anchors[i])
+        strikes_text = f"Погрешних: {strikes}"
+        layer.blit(render_text(self.font_regular, strikes_text, RED), (50, self.screen_height - 50))
+        if state == "opponent":
+            opp_text = "Шанса противника!"
+            layer.blit(render_text(self.font_regular, opp_text, GRAY), (50, self.screen_height - 100))
+        footer_text = render_text(self.font_footer, "РГ за истраживачко-развојне делатности, ЕТФ, 2025 ©", GOLD)
+        layer.blit(footer_text, (self.screen_width - footer_text.get_width() - 10,
+                                 self.screen_height - footer_text.get_height() - 10))
+        return converted(layer, alpha=True), layout.rects
+
+    def get_board_layout(self, question_size, answer_count):
+        """Reuse the board layout until the resolution, the question or the answer count changes."""
+        key = (self.screen.get_size(), question_size, answer_count, self.font_regular.get_height())
+        if self.board_layout is None or self.board_layout.key != key:
+            self.board_layout = BoardLayout(*key)
+        return self.board_layout
+
+    def update_glaze(self, rects):
+        """Advance the glaze stripe and return the rect it covers this frame (None when idle)."""
+        if not self.governor.quality["glaze"]:
+            return None
+        now = self.now
         time_to_next_glaze = random.randint(1500, 5000)
         if self.active_glaze_index is None and now - self.last_glaze_time >= time_to_next_glaze and len(rects) > 0:
             possible_indices = list(range(len(rects)))
@@ -539,29 +3144,20 @@ class FamilyFeudGame:
             self.last_glaze_time = now
         if self.active_glaze_index is not None:
             progress = (now - self.glaze_start_time) / self.glaze_effect_duration
-            if progress < 1.0:
+            if progress < 1.0 and self.active_glaze_index < len(rects):
                 effect_width = 30
-                effect_alpha = 150
                 target_rect = rects[self.active_glaze_index]
                 x_offset = int((target_rect.width - effect_width) * progress)
-                glaze_surface = pygame.Surface((effect_width, target_rect.height), pygame.SRCALPHA)
-                glaze_surface.fill((255, 255, 255, effect_alpha))
-                self.screen.blit(glaze_surface, (target_rect.x + x_offset, target_rect.y))
-            else:
-                self.last_glazed_index = self.active_glaze_index
-                self.active_glaze_index = None
-                self.glaze_start_time = None
-        strikes_text = f"Погрешних: {strikes}"
-        self.screen.blit(self.font_regular.render(strikes_text, True, RED), (50, self.screen_height - 50))
-        if state == "opponent":
-            opp_text = "Шанса противника!"
-            self.screen.blit(self.font_regular.render(opp_text, True, GRAY), (50, self.screen_height - 100))
-        self.draw_footer()
-        pygame.display.flip()
-        return rects
+                return pygame.Rect(target_rect.x + x_offset, target_rect.y, effect_width, target_rect.height)
+            self.last_glazed_index = self.active_glaze_index
+            self.active_glaze_index = None
+            self.glaze_start_time = None
+        return None
 
     def settings_menu(self):
+        # Canceling keeps every other setting (rounds, quality, ...) for the following games
         orig_settings = {
+            **self.settings,
             "screen_width": self.settings.get("screen_width", 1200),
             "screen_height": self.settings.get("screen_height", 800),
             "volume": self.settings.get("volume", 100),
@@ -583,9 +3179,9 @@ class FamilyFeudGame:
         canceled = False
         running = True
         while running:
-            for event in pygame.event.get():
+            for event in self.session.events():
                 if event.type == QUIT:
-                    pygame.quit(); sys.exit()
+                    self.quit()
                 elif event.type == KEYDOWN:
                     if width_active:
                         if event.key == pygame.K_RETURN:
@@ -624,15 +3220,14 @@ class FamilyFeudGame:
                         new_volume = int(min(max(ratio, 0), 1) * 100)
                         if new_volume != sound_volume:
                             sound_volume = new_volume
-                            if self.wrong_sound:
-                                self.wrong_sound.set_volume(0.4 * (sound_volume / 100))
-                                self.wrong_sound.play()
+                            self.audio.set_volumes(sound_volume / 100, music_volume / 100)
+                            self.audio.play("wrong", since=self.session.polled_at)
                     elif music_slider.collidepoint(rel_x, rel_y):
                         ratio = (rel_x - music_slider.x) / music_slider.width
                         new_volume = int(min(max(ratio, 0), 1) * 100)
                         if new_volume != music_volume:
                             music_volume = new_volume
-                            pygame.mixer.music.set_volume(music_volume / 100)
+                            self.audio.set_volumes(sound_volume / 100, music_volume / 100)
                     elif checkbox.collidepoint(rel_x, rel_y):
                         fullscreen = not fullscreen
                     else:
@@ -652,57 +3247,56 @@ class FamilyFeudGame:
                         new_volume = int(min(max(ratio, 0), 1) * 100)
                         if new_volume != sound_volume:
                             sound_volume = new_volume
-                            if self.wrong_sound:
-                                self.wrong_sound.set_volume(0.4 * (sound_volume / 100))
-                                self.wrong_sound.play()
+                            self.audio.set_volumes(sound_volume / 100, music_volume / 100)
+                            self.audio.play("wrong", since=self.session.polled_at)
                     elif music_slider.collidepoint(rel_x, rel_y):
                         ratio = (rel_x - music_slider.x) / music_slider.width
                         new_volume = int(min(max(ratio, 0), 1) * 100)
                         if new_volume != music_volume:
                             music_volume = new_volume
-                            pygame.mixer.music.set_volume(music_volume / 100)
-            modal = pygame.Surface((modal_w, modal_h))
+                            self.audio.set_volumes(sound_volume / 100, music_volume / 100)
+            modal = new_surface((modal_w, modal_h))
             modal.fill((50, 50, 50))
             pygame.draw.rect(modal, WHITE, modal.get_rect(), 2)
-            modal.blit(font.render("Ширина:", True, WHITE), (20, 20))
+            modal.blit(render_text(font, "Ширина:", WHITE), (20, 20))
             pygame.draw.rect(modal, WHITE, (200, 20, 150, 30), 2)
-            text_width = font.render(manual_width, True, WHITE)
+            text_width = render_text(font, manual_width, WHITE)
             modal.blit(text_width, (205, 20))
-            if width_active and (pygame.time.get_ticks() // 500) % 2 == 0:
+            if width_active and (self.now // 500) % 2 == 0:
                 cursor_x = 205 + text_width.get_width() + 2
                 pygame.draw.line(modal, WHITE, (cursor_x, 20), (cursor_x, 20 + text_width.get_height()), 2)
-            modal.blit(font.render("Висина:", True, WHITE), (20, 70))
+            modal.blit(render_text(font, "Висина:", WHITE), (20, 70))
             pygame.draw.rect(modal, WHITE, (200, 70, 150, 30), 2)
-            text_height = font.render(manual_height, True, WHITE)
+            text_height = render_text(font, manual_height, WHITE)
             modal.blit(text_height, (205, 70))
-            if height_active and (pygame.time.get_ticks() // 500) % 2 == 0:
+            if height_active and (self.now // 500) % 2 == 0:
                 cursor_x = 205 + text_height.get_width() + 2
                 pygame.draw.line(modal, WHITE, (cursor_x, 70), (cursor_x, 70 + text_height.get_height()), 2)
-            modal.blit(font.render("Звук:", True, WHITE), (20, 120))
+            modal.blit(render_text(font, "Звук:", WHITE), (20, 120))
             sound_slider_rect = pygame.Rect(200, 120, 300, 20)
             pygame.draw.rect(modal, GRAY, sound_slider_rect)
             sound_ratio = sound_volume / 100
             knob_x = 200 + int(sound_ratio * 300) - 5
             pygame.draw.rect(modal, WHITE, (knob_x, 115, 10, 30))
-            modal.blit(font.render("Музика:", True, WHITE), (20, 170))
+            modal.blit(render_text(font, "Музика:", WHITE), (20, 170))
             music_slider_rect = pygame.Rect(200, 170, 300, 20)
             pygame.draw.rect(modal, GRAY, music_slider_rect)
             music_ratio = music_volume / 100
             music_knob_x = 200 + int(music_ratio * 300) - 5
             pygame.draw.rect(modal, WHITE, (music_knob_x, 165, 10, 30))
-            modal.blit(font.render("Пун екран:", True, WHITE), (20, 220))
+            modal.blit(render_text(font, "Пун екран:", WHITE), (20, 220))
             pygame.draw.rect(modal, WHITE, (200, 220, 30, 30), 2)
             if fullscreen:
                 pygame.draw.rect(modal, WHITE, (203, 223, 24, 24))
             save_rect = pygame.Rect(modal_w // 2 - 50, modal_h - 60, 100, 30)
             pygame.draw.rect(modal, GRAY, save_rect)
-            modal.blit(font.render("Сачувај", True, BLACK), (save_rect.x + 10, save_rect.y))
-            modal.blit(font.render("Притисни ESC за повратак назад", True, WHITE), (modal_w // 2 - 180, modal_h - 30))
+            modal.blit(render_text(font, "Сачувај", BLACK), (save_rect.x + 10, save_rect.y))
+            modal.blit(render_text(font, "Притисни ESC за повратак назад", WHITE), (modal_w // 2 - 180, modal_h - 30))
             self.screen.fill(BLACK)
             self.draw_background()
             self.screen.blit(modal, (modal_x, modal_y))
             pygame.display.flip()
-            self.clock.tick(60)
+            self.tick()
         if canceled:
             return orig_settings
         try:
@@ -721,6 +3315,34 @@ class FamilyFeudGame:
         self.save_settings()
         return self.settings
 
+    def stats_screen(self):
+        """Statistics from the journal's aggregate tables; ESC or S closes it."""
+        stats = self.session.recorded("stats", lambda: self.journal.stats(limit=5))
+        font = load_font(FONT_PATHS, SETTINGS_SIZE, "Roboto")
+        # Measured from the rendered lines: the fonts are only used under the text cache's lock
+        surfaces = [render_text(font, line, GOLD if not line.startswith(" ") else WHITE) for line in format_stats(stats)]
+        modal_w = min(self.screen_width - 40, max(surface.get_width() for surface in surfaces) + 40)
+        modal_h = min(self.screen_height - 40, len(surfaces) * font.get_linesize() + 80)
+        modal = new_surface((modal_w, modal_h))
+        modal.fill((50, 50, 50))
+        pygame.draw.rect(modal, WHITE, modal.get_rect(), 2)
+        y = 20
+        for surface in surfaces:
+            modal.blit(surface, (20, y))
+            y += font.get_linesize()
+        modal.blit(render_text(font, "Притисни ESC за повратак назад", WHITE), (20, modal_h - 40))
+        running = True
+        while running:
+            for event in self.session.events():
+                if event.type == QUIT:
+                    self.quit()
+                elif event.type == KEYDOWN and event.key in (K_ESCAPE, pygame.K_s):
+                    running = False
+            self.draw_background()
+            self.screen.blit(modal, modal.get_rect(center=(self.screen_width // 2, self.screen_height // 2)))
+            pygame.display.flip()
+            self.tick()
+
     def load_settings(self):
         settings_file = "settings.json"
         if os.path.exists(settings_file):
@@ -729,202 +3351,411 @@ class FamilyFeudGame:
         return DEFAULT_SETTINGS.copy()
 
     def save_settings(self):
+        if self.session.replaying:
+            return
         with open("settings.json", "w") as f:
             json.dump(self.settings, f, indent=4)
 
     def choose_team(self, total_team1, total_team2):
-        selecting = True
+        chosen_team = None
+        fade = None
         current_x = -300
         target_x = 50
-        last_time = pygame.time.get_ticks()
-        while selecting:
-            dt = pygame.time.get_ticks() - last_time
-            last_time = pygame.time.get_ticks()
-            current_x = min(target_x, current_x + dt * 0.5)
-            
+        buzzed_at = None
+        if self.buzzer is not None:
+            self.buzzer.arm()
+
+        def draw_scene():
             # Instead of filling with black, draw the video background.
             self.draw_background()
             
             prompt1 = "Који тим игра у овој рунди?"
             prompt2 = f"Притисните 1 за {self.team1_name} или 2 за {self.team2_name}"
-            self.screen.blit(self.font_regular.render(prompt1, True, WHITE), 
+            self.screen.blit(render_text(self.font_regular, prompt1, WHITE), 
                             (current_x, self.screen_height // 2 - 60))
-            self.screen.blit(self.font_regular.render(prompt2, True, WHITE), 
+            self.screen.blit(render_text(self.font_regular, prompt2, WHITE), 
                             (current_x, self.screen_height // 2))
             
             scoreboard = f"Резултат уживо - {self.team1_name}: {total_team1} | {self.team2_name}: {total_team2}"
-            self.screen.blit(self.font_regular.render(scoreboard, True, WHITE), 
+            self.screen.blit(render_text(self.font_regular, scoreboard, WHITE), 
                             (self.screen_width // 3, self.screen_height // 80))
             
-            hint = self.font_regular.render("Притисни П да отвориш опције", True, WHITE)
+            hint = render_text(self.font_regular, "Притисни П да отвориш опције, С за статистику", WHITE)
             self.screen.blit(hint, (50, self.screen_height - 50))
             
             self.draw_footer()
-            pygame.display.flip()
-            
-            for event in pygame.event.get():
+
+        while fade is None or not fade.finished:
+            current_x = min(target_x, current_x + self.frame_dt * 0.5)
+            PROFILER.begin("events")
+            for event in self.session.events():
                 if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
-                    pygame.quit(); sys.exit()
+                    self.quit()
+                elif event.type == KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                    self.toggle_debug(event.key)
+                elif self.animator.blocking:
+                    if event.type in (KEYDOWN, MOUSEBUTTONDOWN):
+                        self.animator.skip()
                 elif event.type == KEYDOWN:
                     if event.key == pygame.K_p:
                         # Open settings menu
                         self.settings = self.settings_menu()
-                        pygame.mixer.music.set_volume(self.settings.get("music_volume", 100) / 100)
-                        flags = pygame.FULLSCREEN if self.settings["fullscreen"] else 0
-                        self.screen = pygame.display.set_mode(
-                            (self.settings["screen_width"], self.settings["screen_height"]), flags)
-                        self.screen_width = self.settings["screen_width"]
-                        self.screen_height = self.settings["screen_height"]
-                        if self.wrong_sound:
-                            self.wrong_sound.set_volume(0.4 * (self.settings.get("volume", 100) / 100))
-                        if self.correct_sound:
-                            self.correct_sound.set_volume(self.settings.get("volume", 100) / 100)
-                        self.apply_font_settings()
+                        self.apply_settings()
                         continue
-                    elif event.unicode == '1':
-                        if self.correct_sound:
-                            self.correct_sound.play()
-                        self.fade_transition(fade_in=False, duration=500)
-                        return 1
-                    elif event.unicode == '2':
-                        if self.correct_sound:
-                            self.correct_sound.play()
-                        self.fade_transition(fade_in=False, duration=500)
-                        return 2
-            
-            self.clock.tick(60)
+                    elif event.key == pygame.K_s:
+                        self.stats_screen()
+                        continue
+                    elif event.unicode in ('1', '2'):
+                        self.audio.play("correct", since=self.session.polled_at)
+                        chosen_team = int(event.unicode)
+                        fade = self.fade_transition(fade_in=False, duration=500)
+                elif event.type == BUZZER_EVENT and chosen_team is None:
+                    buzzed_at = getattr(event, "pressed_at", None)  # Not in a replay
+                    since = self.session.polled_at
+                    if buzzed_at is not None:
+                        # The press time is on the monotonic clock
+                        since = time.perf_counter_ns() - (time.monotonic_ns() - buzzed_at)
+                    self.audio.play("correct", since=since)
+                    chosen_team = event.team
+                    fade = self.fade_transition(fade_in=False, duration=500)
+            PROFILER.end("events")
+            self.animator.update(self.frame_dt)
+            self.present(draw_scene)
+            if buzzed_at is not None and self.buzzer is not None:
+                self.buzzer.record_latency(buzzed_at)
+                buzzed_at = None
+            self.tick()
+        if self.buzzer is not None:
+            self.buzzer.disarm()
+        return chosen_team
+
+    def apply_settings(self):
+        """Apply settings saved from the settings menu: display mode, volumes and size-dependent caches."""
+        flags = pygame.FULLSCREEN if self.settings["fullscreen"] else 0
+        self.screen = pygame.display.set_mode((self.settings["screen_width"], self.settings["screen_height"]), flags)
+        self.screen_width = self.settings["screen_width"]
+        self.screen_height = self.settings["screen_height"]
+        self.video_bg.invalidate_cache()
+        self.board_signature = None  # The layer was converted for the old display surface
+        self.audio.set_volumes(self.settings.get("volume", 100) / 100, self.settings.get("music_volume", 100) / 100)
+        self.apply_font_settings()
 
     def apply_font_settings(self):
-        """Update fonts after settings changes"""
+        """Update fonts after settings changes (served from the font registry, not from disk)"""
         self.font_regular = load_font(FONT_PATHS, REGULAR_SIZE, "Roboto")
-        self.font_question = load_font(BOLD_FONT_PATHS, QUESTION_SIZE, "Roboto")
+        self.font_question = load_font(BOLD_FONT_PATHS, QUESTION_SIZE, "Roboto", bold=True)
         self.font_footer = load_font(FONT_PATHS, FOOTER_SIZE, "Roboto")
 
+    def draw_question(self):
+        """Next question for the configured category and difficulty; the bank starts over once all are used."""
+        category = self.settings.get("question_category", "")
+        difficulty = self.settings.get("question_difficulty", 0)
+        entry = self.bank.draw(category, difficulty)
+        if entry is None and self.bank.total() > 0:
+            print("Сва питања су искоришћена; банка почиње испочетка.")
+            self.bank.reset()
+            entry = self.bank.draw(category, difficulty)
+        return entry
+
+    def prepare_round(self, round_num, entry=None):
+        """Draw (unless given) and lay out a round's question and render its texts; runs on the prefetcher's thread."""
+        if entry is None:
+            entry = self.draw_question()
+        if entry is None:
+            return None
+        # Straight to the cache: render_text would also time the main thread's profiler phases
+        q_surf = TEXT_CACHE.render(self.font_question, entry["question"], BLACK)
+        for i, answer in enumerate(entry["answers"]):
+            TEXT_CACHE.render(self.font_regular, f"{i+1}. {answer['answer']} - {answer['points']}", BLACK)
+            TEXT_CACHE.render(self.font_regular, f"{i+1}.", BLACK)
+        layout = BoardLayout(self.screen.get_size(), q_surf.get_size(), len(entry["answers"]),
+                             self.font_regular.get_height())
+        return {"entry": entry, "layout": layout}
+
+    def prefetch_rounds(self, first, last):
+        """Queue rounds first..last (up to the prefetch depth); a replay prepares the questions its log hands out."""
+        for round_num in range(first, min(last, first + self.prefetcher.depth - 1) + 1):
+            upcoming = self.session.upcoming("question", round_num - first)
+            if self.session.replaying and upcoming is None:
+                break
+            self.prefetcher.schedule(round_num, upcoming)
+
+    def start_round(self, round_num, rounds):
+        """The prepared round, from the prefetcher when it is on; the next rounds are queued behind it."""
+        if self.prefetcher is not None:
+            PROFILER.begin("prefetch")
+            prepared = self.prefetcher.take(round_num)
+            PROFILER.end("prefetch")
+        else:
+            prepared = self.prepare_round(round_num, self.session.upcoming("question"))
+        entry = self.session.recorded("question", lambda: prepared["entry"] if prepared else self.draw_question())
+        if self.prefetcher is not None:
+            self.prefetch_rounds(round_num + 1, rounds)
+        if entry is None:
+            return None
+        if prepared is None or prepared["entry"] != entry:
+            prepared = self.prepare_round(round_num, entry)
+        return prepared
+
     def run(self):
-        for round_num in range(1, 6):
-            active_team = self.choose_team(self.total_team1, self.total_team2)
-            team1_round, team2_round = 0, 0
-            round_file = f"questions/round{round_num}.txt"
-            if not os.path.exists(round_file):
-                print(f"Фајл {round_file} није пронађен.")
-                continue
-            with open(round_file, "r", encoding="utf-8") as f:
-                lines = [line.strip() for line in f if line.strip()]
-            if not lines:
-                continue
-            question = lines[0]
-            answers = []
-            for line in lines[1:]:
-                parts = line.split(',')
-                if len(parts) == 2:
-                    try:
-                        points = int(parts[1].strip())
-                    except ValueError:
-                        points = 0
-                    answers.append({"answer": parts[0].strip(), "points": points, "revealed": False})
-            strikes = 0
-            state = "active"
-            last_time = pygame.time.get_ticks()
-            while True:
-                dt = pygame.time.get_ticks() - last_time
-                last_time = pygame.time.get_ticks()
-                self.video_bg.update(0)
-                rects = self.draw_board(question, answers, strikes, state, active_team)
-                for event in pygame.event.get():
+        rounds = self.settings.get("rounds", 5)
+        resume = self.session.recorded(
+            "resume", lambda: self.journal.resume_state(self.journal.unfinished_game()) if self.resume else None)
+        current = None
+        if resume is not None:
+            self.journal.game_id = resume["game_id"]
+            self.team1_name, self.team2_name = resume["team1"], resume["team2"]
+            self.total_team1, self.total_team2 = resume["total1"], resume["total2"]
+            self.round_results = resume["round_results"]
+            first_round, current = resume["round"], resume["current"]
+            print(f"Наставља се игра #{resume['game_id']} од рунде {first_round}.")
+        else:
+            self.journal.start_game(self.team1_name, self.team2_name)
+            first_round = 1
+        depth = self.settings.get("prefetch_rounds", 1)
+        if depth > 0:
+            self.prefetcher = RoundPrefetcher(self.prepare_round, depth)
+            resumed_question = current is not None and current["question"] is not None
+            self.prefetch_rounds(first_round + resumed_question, rounds)
+        for round_num in range(first_round, rounds + 1):
+            if current is not None:
+                active_team = current["team"]
+            else:
+                active_team = self.choose_team(self.total_team1, self.total_team2)
+                self.journal.log("team", round_num, team=active_team)
+            if current is not None and current["question"] is not None:
+                prepared = self.prepare_round(round_num, current["question"])
+            else:
+                prepared = self.start_round(round_num, rounds)
+                if prepared is not None:
+                    self.journal.log("question", round_num, entry=prepared["entry"])
+            if prepared is None:
+                print("Нема питања у банци за изабрану категорију и тежину.")
+                break
+            question = prepared["entry"]["question"]
+            points = [answer["points"] for answer in prepared["entry"]["answers"]]
+            if current is not None:
+                round_state = RoundState.restore(points, current)
+                current = None
+            else:
+                round_state = RoundState(points, active_team)
+            # What the board draws; the rules live in round_state
+            answers = [dict(answer, revealed=round_state.is_revealed(i))
+                       for i, answer in enumerate(prepared["entry"]["answers"])]
+
+            def reveal(index):
+                kind = round_state.reveal(index)
+                if kind is None:
+                    return
+                answers[index]["revealed"] = True
+                self.audio.play("correct", since=self.session.polled_at)
+                journal(kind, index)
+
+            def journal(kind, index=None):
+                # Board events carry the state after the move so a resume can restore it as is
+                data = round_state.snapshot()
+                if kind == "steal":
+                    data["success"] = index is not None
+                self.journal.log(kind, round_num, index=index, **data)
+
+            # The prefetched layout is used as long as the resolution and fonts have not changed since
+            self.board_layout = prepared["layout"]
+            round_over = None
+            while round_over is None or not round_over.finished:
+                PROFILER.begin("events")
+                for event in self.session.events():
                     if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
-                        pygame.quit(); sys.exit()
+                        self.quit()
+                    elif event.type == KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4):
+                        self.toggle_debug(event.key)
+                    elif self.animator.blocking:
+                        if event.type in (KEYDOWN, MOUSEBUTTONDOWN):
+                            self.animator.skip()
                     elif event.type == KEYDOWN:
                         if event.key == pygame.K_p:
                             self.settings = self.settings_menu()
-                            pygame.mixer.music.set_volume(self.settings.get("music_volume", 100) / 100)
-                            flags = pygame.FULLSCREEN if self.settings["fullscreen"] else 0
-                            self.screen = pygame.display.set_mode((self.settings["screen_width"], self.settings["screen_height"]), flags)
-                            self.screen_width = self.settings["screen_width"]
-                            self.screen_height = self.settings["screen_height"]
-                            if self.wrong_sound:
-                                self.wrong_sound.set_volume(0.4 * (self.settings.get("volume", 100) / 100))
-                            if self.correct_sound:
-                                self.correct_sound.set_volume(self.settings.get("volume", 100) / 100)
-                            self.apply_font_settings()
+                            self.apply_settings()
                             continue
-                        elif state == "active":
-                            if event.unicode.isdigit():
-                                idx = int(event.unicode) - 1
-                                if 0 <= idx < len(answers) and not answers[idx]["revealed"]:
-                                    answers[idx]["revealed"] = True
-                                    if self.correct_sound:
-                                        self.correct_sound.play()
-                                    if active_team == 1:
-                                        team1_round += answers[idx]["points"]
-                                    else:
-                                        team2_round += answers[idx]["points"]
-                            elif event.key == pygame.K_x:
-                                self.show_wrong_feedback()
-                                strikes += 1
-                                if strikes >= 3:
-                                    state = "opponent" if not all(a["revealed"] for a in answers) else "round_over"
-                        elif state == "opponent":
+                        elif round_state.state != "round_over":
                             if event.unicode.isdigit():
-                                idx = int(event.unicode) - 1
-                                if 0 <= idx < len(answers) and not answers[idx]["revealed"]:
-                                    answers[idx]["revealed"] = True
-                                    if self.correct_sound:
-                                        self.correct_sound.play()
-                                    if active_team == 1:
-                                        team2_round = team1_round + answers[idx]["points"]
-                                        team1_round = 0
-                                    else:
-                                        team1_round = team2_round + answers[idx]["points"]
-                                        team2_round = 0
-                                    state = "round_over"
+                                reveal(int(event.unicode) - 1)
                             elif event.key == pygame.K_x:
-                                self.show_wrong_feedback()
-                                state = "round_over"
+                                kind = round_state.strike()
+                                self.show_wrong_feedback(since=self.session.polled_at)
+                                journal(kind)
                     elif event.type == MOUSEBUTTONDOWN and event.button == 1:
-                        pos = pygame.mouse.get_pos()
-                        for i, rect in enumerate(rects):
-                            if rect.collidepoint(pos) and not answers[i]["revealed"]:
-                                answers[i]["revealed"] = True
-                                if self.correct_sound:
-                                    self.correct_sound.play()
-                                if state == "active":
-                                    if active_team == 1:
-                                        team1_round += answers[i]["points"]
-                                    else:
-                                        team2_round += answers[i]["points"]
-                                elif state == "opponent":
-                                    if active_team == 1:
-                                        team2_round = team1_round + answers[i]["points"]
-                                        team1_round = 0
-                                    else:
-                                        team1_round = team2_round + answers[i]["points"]
-                                        team2_round = 0
-                                    state = "round_over"
-                if state == "active" and all(a["revealed"] for a in answers):
-                    state = "round_over"
-                if state == "round_over":
-                    self.draw_board(question, answers, strikes, state, active_team)
-                    pygame.display.flip()
-                    pygame.time.wait(1000)
-                    if active_team == 1:
-                        self.total_team1 += team1_round
-                        self.total_team2 += team2_round
-                    else:
-                        self.total_team2 += team2_round
-                        self.total_team1 += team1_round
-                    self.save_round_result(round_num, self.total_team1, self.total_team2)
-                    self.round_results.append(f"Рунда {round_num}: {team1_round}:{team2_round}")
-                    self.fade_transition(fade_in=False, duration=500)
-                    self.show_round_over_popup(self.round_results)
-                    self.fade_transition(fade_in=True, duration=500)
-                    break
-                self.clock.tick(60)
-        self.draw_background()
+                        i = self.board_layout.answer_at(event.pos) if self.board_layout else None
+                        if i is not None:
+                            reveal(i)
+                if round_state.state == "round_over" and round_over is None:
+                    round_over = self.animator.play(
+                        self.round_over_steps(round_num, round_state.team1_round, round_state.team2_round),
+                        tag="round_over")
+                PROFILER.end("events")
+                self.animator.update(self.frame_dt)
+                board = (question, answers, round_state.strikes, round_state.state, round_state.active_team)
+                if self.animator.active or self.debug_overlay or PROFILER.enabled:
+                    self.present(lambda: self.draw_board(*board, present=False))
+                else:
+                    self.draw_board(*board)
+                self.tick()
+        self.journal.log("game_end", rounds, total1=self.total_team1, total2=self.total_team2)
+        if self.prefetcher is not None:
+            self.release_prefetched()
+            self.prefetcher.report()
         self.show_confetti(duration=3000)
-        pygame.time.wait(5000)
-        self.conn.close()
-        return
+        self.play_animations()
+
+    def release_prefetched(self):
+        """Stop the round prefetcher and put the questions it drew ahead back into the bank."""
+        if self.prefetcher is None:
+            return
+        for prepared in self.prefetcher.shutdown():
+            if not self.session.replaying:
+                self.bank.release(prepared["entry"]["id"])
+
+    def quit(self):
+        """Closed window or ESC: leave the game, without the rounds drawn ahead counting as used."""
+        self.release_prefetched()
+        pygame.quit(); sys.exit()
+
+    def close(self):
+        """Release what outlives a game: the journal, the question bank, the video decoder and the servers."""
+        self.release_prefetched()
+        self.journal.close()
+        self.bank.close()
+        self.video_bg.close()
+        if self.buzzer is not None:
+            self.buzzer.report()
+            self.buzzer.close()
+        if self.spectator is not None:
+            self.spectator.report()
+            self.spectator.close()
+        self.audio.report()
+        ASSETS.close()
+
+    def round_over_steps(self, round_num, team1_round, team2_round):
+        """End of round: hold the board, record the totals, then the summary popup between two fades."""
+        def record_round():
+            self.total_team1 += team1_round
+            self.total_team2 += team2_round
+            self.journal.log("round_end", round_num, team1_round=team1_round, team2_round=team2_round,
+                             total1=self.total_team1, total2=self.total_team2)
+            self.round_results.append(f"Рунда {round_num}: {team1_round}:{team2_round}")
+
+        return ([Tween(1000, on_finish=record_round)]
+                + self.fade_steps(fade_in=False, duration=500)
+                + self.show_round_over_popup(self.round_results)
+                + self.fade_steps(fade_in=True, duration=500))
 
 if __name__ == "__main__":
-    while True:
-        FamilyFeudGame().run()
+    multiprocessing.freeze_support()  # The question compiler's worker processes in a PyInstaller build
+    parser = argparse.ArgumentParser(description="Породични Дуел")
+    parser.add_argument("--record", metavar="DIR", help="save each game's input to a recording in DIR")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded game")
+    parser.add_argument("--fast", action="store_true", help="replay as fast as possible instead of at the recorded pace")
+    parser.add_argument("--resume", action="store_true", help="continue the last interrupted game from its journal")
+    parser.add_argument("--stats", action="store_true", help="print the leaderboard and question statistics and exit")
+    parser.add_argument("--rebuild-stats", action="store_true", help="recompute the statistics from the journal first")
+    parser.add_argument("--import-questions", metavar="FILE", nargs="+", help="add question files to the question bank and exit")
+    parser.add_argument("--compile-questions", metavar="DIR", nargs="?", const=QUESTIONS_DIR,
+                        help="compile a question folder into the bank, print the lint report and exit")
+    parser.add_argument("--build-bundle", metavar="FILE", nargs="?", const=ASSET_BUNDLE,
+                        help="pack the assets and questions folders into one bundle file and exit")
+    parser.add_argument("--simulate", metavar="ROUNDS", type=int,
+                        help="play ROUNDS random rounds over the question bank without a window, check the scoring and exit")
+    parser.add_argument("--skill", type=float, default=0.6, help="chance that a simulated guess is on the board")
+    parser.add_argument("--workers", type=int, help="simulator processes (default: one per CPU)")
+    parser.add_argument("--buzzer-test", metavar="CLIENTS", type=int,
+                        help="run face-offs between CLIENTS simulated buzzers on a local server and exit")
+    parser.add_argument("--category", default="", help="category of the imported questions")
+    parser.add_argument("--difficulty", type=int, default=1, help="difficulty of the imported questions")
+    args = parser.parse_args()
+    if args.stats or args.rebuild_stats:
+        journal = GameJournal()
+        if args.rebuild_stats:
+            journal.rebuild_stats()
+        for line in format_stats(journal.stats(), width=70):
+            print(line)
+        journal.close()
+        sys.exit(0)
+    if args.buzzer_test:
+        decisions = []
+        window_ms = DEFAULT_SETTINGS["buzzer_window_ms"]
+        server = BuzzerServer("127.0.0.1", 0, window_ms, post=decisions.append)
+        decided, wrong, close, latencies = asyncio.run(simulate_buzzers(server.port, args.buzzer_test, arm=server.arm))
+        server.close()
+        latencies.sort()
+        print(f"{decided} надметања са {args.buzzer_test} зујалица (прозор {window_ms} ms): {wrong} погрешних одлука, "
+              f"{close} у оквиру {BUZZER_TEST_MARGIN_MS} ms; од притиска до резултата p50 {latencies[len(latencies) // 2]:.1f} ms, "
+              f"најдуже {latencies[-1]:.1f} ms")
+        sys.exit(1 if wrong else 0)
+    if args.build_bundle:
+        start = time.perf_counter()
+        count, size = AssetBundle.build(args.build_bundle)
+        print(f"Спаковано {count} фајлова ({size / 2**20:.1f} MB) у {args.build_bundle} "
+              f"за {time.perf_counter() - start:.2f} s.")
+        sys.exit(0)
+    if args.simulate:
+        bank = QuestionBank()
+        if os.path.isdir(QUESTIONS_DIR) or questions_bundled():
+            bank.compile(QUESTIONS_DIR)
+        questions = bank.point_lists()
+        bank.close()
+        if not questions:
+            print("Банка питања је празна.")
+            sys.exit(1)
+        start = time.perf_counter()
+        totals = run_simulation([points for _, points in questions], args.simulate, args.skill, args.workers)
+        for line in format_simulation(totals, [question for question, _ in questions], time.perf_counter() - start):
+            print(line)
+        sys.exit(1 if totals["violations"] else 0)
+    if args.compile_questions:
+        bank = QuestionBank()
+        start = time.perf_counter()
+        changed = bank.compile(args.compile_questions)
+        issues = bank.lint_issues()
+        for line in format_lint_report(issues):
+            print(line)
+        errors = sum(1 for issue in issues if issue[1] == "error")
+        print(f"Преведено {changed} измењених фајлова за {time.perf_counter() - start:.2f} s; "
+              f"{errors} грешака, {len(issues) - errors} упозорења; у банци има {bank.total()} питања.")
+        bank.close()
+        sys.exit(1 if errors else 0)
+    if args.import_questions:
+        bank = QuestionBank()
+        added = bank.import_files(args.import_questions, args.category, args.difficulty)
+        print(f"Увезено {added} нових питања; у банци има {bank.available()} неискоришћених од {bank.total()}.")
+        bank.close()
+        sys.exit()
+    if args.replay:
+        session = InputSession("replay", args.replay, fast=args.fast)
+        game = None
+        try:
+            game = FamilyFeudGame(session)
+            game.run()
+        finally:
+            if game is not None:
+                game.close()
+            session.close()
+    else:
+        def new_session():
+            if not args.record:
+                return InputSession()
+            os.makedirs(args.record, exist_ok=True)
+            return InputSession("record", os.path.join(args.record, time.strftime("session-%Y%m%d-%H%M%S.ffrec")))
+
+        session = new_session()
+        game = None
+        try:
+            game = FamilyFeudGame(session, resume=args.resume)
+            while True:
+                game.run()
+                session.close()
+                session = new_session()
+                game.new_game(session)
+        finally:
+            # Also on a closed window or a crash, so the last journal batch is not lost
+            if game is not None:
+                game.close()
+            session.close()